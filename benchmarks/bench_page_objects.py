@@ -0,0 +1,295 @@
+"""
+Benchmark the page-object hot paths against locally served synthetic results pages,
+and fail on regressions against a stored baseline.
+
+Run from the repository root:
+    python -m benchmarks.bench_page_objects [--cards 20 200 2000] [--save-baseline]
+    python -m benchmarks.bench_page_objects --baseline benchmarks/baseline.json --threshold 0.25
+
+Results are written as JSON (--output). With --baseline, every benchmark slower than
+baseline * (1 + threshold) (and by more than --min-delta-ms) is reported and the
+exit code is 1. --save-baseline writes the current results as the new baseline.
+Baselines are machine-specific, so none is committed: CI should save one on its own
+runner and pass --require-baseline, which fails when the baseline is missing instead
+of silently passing.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from listing_analysis import analyze_listings
+from price_parser import parse_price, price_value
+from replay import ReplayFixture, SnapshotServer
+from save_results import save_search_results
+
+DEFAULT_BASELINE = os.path.join("benchmarks", "baseline.json")
+SEARCH_PATH = "/s/Bench/homes"
+
+# One synthetic card per get_all_listings detection approach: only that approach's
+# selectors match, so the earlier approaches miss and fall through to it
+CARD_TEMPLATES = {
+    "selectors": (
+        '<div itemprop="itemListElement" class="card">'
+        '<a href="/rooms/{id}"><img src="data:," width="280" height="200"></a>'
+        '<div data-testid="listing-card-title">{name}</div>'
+        '<span data-testid="price-label"><span>{price}</span></span>'
+        '<span aria-label="{rating} out of 5 average rating, {reviews} reviews">{rating} ({reviews})</span>'
+        '</div>'
+    ),
+    "price_anchor": (
+        '<article class="card"><div><div>'
+        '<a href="/rooms/{id}">{name}</a>'
+        '<span data-testid="price-label">{price}</span>'
+        '</div></div></article>'
+    ),
+    "image_anchor": (
+        '<article class="card"><div><div>'
+        '<a href="/rooms/{id}"><img data-testid="listing-card-image" src="data:," width="280" height="200"></a>'
+        '<p>{name}</p>'
+        '</div></div></article>'
+    ),
+    "large_container": (
+        '<div style="width: 300px; height: 320px;" class="card">'
+        '<h3>{name}</h3><a href="/rooms/{id}">{price}</a>'
+        '</div>'
+    ),
+}
+
+PAGE_TEMPLATE = '''<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Bench results</title>
+<style>
+  main {{ display: flex; flex-wrap: wrap; }}
+  .card {{ display: block; width: 300px; height: 320px; margin: 4px; }}
+</style></head>
+<body><main>{cards}</main></body></html>
+'''
+
+
+def make_cards(count, seed=42):
+    rng = random.Random(seed)
+    cards = []
+    for index in range(count):
+        nights = rng.randint(1, 7)
+        per_night = rng.randint(250, 2500)
+        price = rng.choice([f"₪{per_night:,} night", f"₪{per_night * nights:,} total before taxes",
+                            f"₪{int(per_night * 1.2):,} ₪{per_night:,} night"])
+        cards.append({
+            "id": 10_000_000 + index,
+            "name": f"Bench apartment {index} {rng.choice(['family', 'studio', 'loft', 'spacious'])}",
+            "price": price,
+            "rating": round(rng.uniform(4.0, 5.0), 2),
+            "reviews": rng.randint(1, 900),
+        })
+    return cards
+
+
+def write_fixture(directory, approach, count):
+    """Write a synthetic results page as a replay fixture and return it."""
+    name = f"{approach}_{count}"
+    fixture = ReplayFixture(name, "snapshot", directory)
+    os.makedirs(fixture.directory, exist_ok=True)
+    cards = "".join(CARD_TEMPLATES[approach].format(**card) for card in make_cards(count))
+    with open(os.path.join(fixture.directory, "results.html"), "w", encoding="utf-8") as f:
+        f.write(PAGE_TEMPLATE.format(cards=cards))
+    with open(fixture.manifest_path, "w", encoding="utf-8") as f:
+        json.dump({SEARCH_PATH: "results.html"}, f)
+    return fixture
+
+
+def best_of(repeat, function, *args, setup=None):
+    """
+    Best wall time in ms over repeat calls of function (output suppressed), and its last result.
+    setup, if given, runs untimed before every call (e.g. to clear caches).
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            result = function(*args)
+            best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+async def best_of_async(repeat, function, *args, setup=None):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            result = await function(*args)
+            best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def bench_python(counts, repeat):
+    """Benchmarks that don't need a browser (or Playwright)."""
+    timings = {}
+    for count in counts:
+        cards = make_cards(count)
+        texts = [card["price"] for card in cards]
+
+        def parse_prices():
+            for text in texts:
+                price_value(text, 5)
+
+        # Cleared before every run, so parsing is measured rather than cache hits
+        timings[f"price_value[n={count}]"] = best_of(repeat, parse_prices, setup=parse_price.cache_clear)[0]
+        listings = [dict(card, price_value=price_value(card["price"], 5)) for card in cards]
+        timings[f"analyze_listings[n={count}]"] = best_of(repeat, analyze_listings, listings)[0]
+
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            listing = {"name": "Bench apartment", "rating": 4.9, "price": "₪750 night"}
+            timings["save_search_results"] = best_of(repeat, save_search_results, listing, listing)[0]
+        finally:
+            os.chdir(cwd)
+    return timings
+
+
+async def bench_browser(counts, repeat, details_limit):
+    """Benchmarks that drive the page objects in headless Chromium against local fixture pages."""
+    from playwright.async_api import async_playwright
+
+    from pages.search_results_page import SearchResultsPage
+    from selector_cache import SelectorCache
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        # Error screenshots are written relative to the working directory
+        os.chdir(directory)
+        try:
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(headless=True)
+                try:
+                    for approach in CARD_TEMPLATES:
+                        for count in counts:
+                            fixture = write_fixture(directory, approach, count)
+                            with SnapshotServer(fixture) as server:
+                                page = await browser.new_page(viewport={"width": 1280, "height": 900})
+                                await page.goto(server.url + SEARCH_PATH)
+                                # One page object per page, so its listeners don't pile up across runs
+                                results = SearchResultsPage(page, {"response": 100}, SelectorCache(path=None))
+
+                                def reset():
+                                    # A fresh, unwarmed selector cache, so runs don't learn from each other
+                                    results.selector_cache = SelectorCache(path=None)
+                                    results.invalidate_snapshot()
+                                    results.wait_report.clear()
+
+                                # The wait is timed on its own: approaches whose cards don't match the
+                                # card selectors wait out the whole results timeout before detection
+                                key = f"[{approach}][n={count}]"
+                                timings["wait_for_results" + key] = (
+                                    await best_of_async(repeat, results.wait_for_results, setup=reset))[0]
+                                elapsed, listings = await best_of_async(repeat, results.find_listing_cards,
+                                                                        setup=reset)
+                                timings["find_listing_cards" + key] = elapsed
+                                if len(listings) != count:
+                                    print(f"Warning: {approach} found {len(listings)} of {count} cards")
+                                timings["extract_listing_cards" + key] = (
+                                    await best_of_async(repeat, results.extract_listing_cards, listings))[0]
+
+                                if approach == "selectors":
+                                    subset = listings[:details_limit]
+
+                                    async def details():
+                                        return await asyncio.gather(*[results.get_listing_details(listing)
+                                                                      for listing in subset])
+
+                                    key = f"get_listing_details[n={len(subset)}]"
+                                    timings[key] = (await best_of_async(repeat, details, setup=reset))[0]
+                                await page.close()
+                finally:
+                    await browser.close()
+        finally:
+            os.chdir(cwd)
+    return timings
+
+
+def compare(current, baseline, threshold, min_delta_ms):
+    """Return the regressions as (name, baseline ms, current ms) tuples."""
+    regressions = []
+    for name, elapsed in current.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if elapsed > base * (1 + threshold) and elapsed - base > min_delta_ms:
+            regressions.append((name, base, elapsed))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the page objects on synthetic results pages.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[20, 200, 2000])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (the best one counts)")
+    parser.add_argument("--details-limit", type=int, default=100,
+                        help="Cards whose details are fetched in the get_listing_details fan-out")
+    parser.add_argument("--skip-browser", action="store_true", help="Only run the benchmarks without a browser")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail if a benchmark is this much slower than the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="Ignore slowdowns smaller than this, to absorb timer noise")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    parser.add_argument("--require-baseline", action="store_true",
+                        help="Fail if there is no baseline to compare against (for CI)")
+    args = parser.parse_args()
+
+    timings = bench_python(args.cards, args.repeat)
+    if not args.skip_browser:
+        timings.update(asyncio.run(bench_browser(args.cards, args.repeat, args.details_limit)))
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {name: round(elapsed, 3) for name, elapsed in timings.items()},
+    }
+    for name, elapsed in report["benchmarks"].items():
+        print(f"  {name:<48} {elapsed:>10.2f} ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        if args.require_baseline:
+            sys.exit(1)
+        return
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["benchmarks"]
+    regressions = compare(report["benchmarks"], baseline, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n{len(regressions)} regressions (> {args.threshold:.0%} slower than {args.baseline}):")
+        for name, base, elapsed in regressions:
+            print(f"  {name:<48} {base:>10.2f} ms -> {elapsed:>10.2f} ms ({elapsed / base - 1:+.0%})")
+        sys.exit(1)
+    print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
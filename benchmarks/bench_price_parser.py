@@ -0,0 +1,87 @@
+"""
+Benchmark price parsing on a synthetic sweep of card price texts.
+
+Run from the repository root:
+    python -m benchmarks.bench_price_parser [--texts 100000] [--distinct 2000]
+"""
+import argparse
+import random
+import time
+
+from price_parser import parse_price
+
+TEMPLATES = [
+    "₪{per_night:,} night",
+    "₪{total:,} total before taxes",
+    "₪{original:,} ₪{per_night:,} night",
+    "₪{total:,} for {nights} nights",
+    "₪{per_night:,} night · ₪{total:,} total",
+    "${per_night:,}.50 / night",
+    "€{per_night} night",
+]
+
+
+def make_price_texts(count, distinct, seed=42):
+    """count price texts drawn from distinct unique ones (sweeps repeat the same prices a lot)."""
+    rng = random.Random(seed)
+    unique = []
+    for _ in range(distinct):
+        nights = rng.randint(1, 14)
+        per_night = rng.randint(200, 3000)
+        unique.append(rng.choice(TEMPLATES).format(
+            per_night=per_night, total=per_night * nights, original=int(per_night * 1.2), nights=nights
+        ))
+    return [rng.choice(unique) for _ in range(count)]
+
+
+def old_extract_price_value(price_text):
+    """The previous digit-stripping parser, for comparison."""
+    if not price_text or price_text == "Price not found":
+        return float('inf')
+    digits_only = ''.join(c for c in price_text if c.isdigit() or c == '.')
+    import re
+    match = re.search(r'\d+(?:\.\d+)?', digits_only)
+    if match:
+        return float(match.group())
+    return float('inf')
+
+
+def parse_uncached(texts):
+    return [parse_price.__wrapped__(text) for text in texts]
+
+
+def parse_cached(texts):
+    return [parse_price(text) for text in texts]
+
+
+def parse_old(texts):
+    return [old_extract_price_value(text) for text in texts]
+
+
+def timed(function, *args):
+    started = time.perf_counter()
+    function(*args)
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the price parser.")
+    parser.add_argument("--texts", type=int, default=100_000)
+    parser.add_argument("--distinct", type=int, default=2000)
+    args = parser.parse_args()
+
+    texts = make_price_texts(args.texts, args.distinct)
+    print(f"{len(texts):,} price texts ({args.distinct:,} distinct)")
+
+    parse_price.cache_clear()
+    for name, function in (("old digit stripping", parse_old),
+                           ("parse_price uncached", parse_uncached),
+                           ("parse_price cold cache", parse_cached),
+                           ("parse_price warm cache", parse_cached)):
+        elapsed = timed(function, texts)
+        print(f"  {name:<24} {elapsed:>9.1f} ms  {elapsed * 1000 / len(texts):>6.2f} us/text")
+    print(f"  cache: {parse_price.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark the ranking engine on large synthetic sweeps.
+
+Run from the repository root:
+    python -m benchmarks.bench_ranking [--listings 100000 200000] [--k 10]
+"""
+import argparse
+import random
+import time
+
+from listing_analysis import best_value_score
+from listing_table import ListingTable, np
+from ranking import FORMULAS, RankingEngine
+
+
+def make_listings(count, seed=42):
+    """Synthetic listing dicts with realistic gaps: ~10% unpriced, ~15% unrated, ~30% without reviews."""
+    rng = random.Random(seed)
+    listings = []
+    for index in range(count):
+        listings.append({
+            "listing_id": str(index),
+            "name": f"Listing {index}",
+            "price": None,
+            "price_value": None if rng.random() < 0.10 else round(rng.lognormvariate(6.4, 0.5), 2),
+            "rating": None if rng.random() < 0.15 else round(rng.uniform(3.5, 5.0), 2),
+            "review_count": None if rng.random() < 0.30 else rng.randint(1, 2000),
+        })
+    return listings
+
+
+def timed(function, *args, repeat=3):
+    """Return (best time in ms, result) over a few runs."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function(*args)
+        best = min(best, (time.perf_counter() - started) * 1000)
+    return best, result
+
+
+def loop_best_value(listings, k):
+    """The per-listing Python loop the engine replaces, for comparison."""
+    scored = []
+    for listing in listings:
+        score = best_value_score(listing["rating"], listing["price_value"])
+        if score is not None:
+            scored.append((score, listing["listing_id"]))
+    scored.sort(reverse=True)
+    return scored[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ranking engine.")
+    parser.add_argument("--listings", type=int, nargs="+", default=[100_000, 250_000])
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"NumPy: {'yes (' + np.__version__ + ')' if np is not None else 'no (pure Python fallback)'}")
+    for count in args.listings:
+        listings = make_listings(count)
+        build_ms, table = timed(ListingTable, listings, repeat=1)
+        print(f"\n{count:,} listings (table built in {build_ms:.1f} ms)")
+
+        loop_ms, _ = timed(loop_best_value, listings, args.k)
+        print(f"  {'python loop best_value_fixed':<32} {loop_ms:>9.1f} ms")
+
+        for name, formula in FORMULAS.items():
+            engine = RankingEngine(formula)
+            score_ms, _ = timed(engine.score, table)
+            top_ms, top = timed(engine.top_k, table, args.k)
+            best = f"{top[0][0]:.4f}" if top else "-"
+            print(f"  {name:<32} {score_ms:>9.1f} ms score  {top_ms:>9.1f} ms top-{args.k}  (best {best})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,253 @@
+import pytest
 import pytest_asyncio
 from playwright.async_api import async_playwright
 
-@pytest_asyncio.fixture
-async def page():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False, slow_mo=500)
-        context = await browser.new_context()
+from instrumentation import Instrumentation, set_instrumentation
+from network_profiles import NETWORK_PROFILES, NetworkFilter
+from replay import DEFAULT_FIXTURES_DIR, REPLAY_MODES, ReplayFixture
+from round_trips import RoundTripBudgetExceeded, RoundTripCounter, set_round_trip_counter
+from save_results import close_results_writer
+from screenshots import DEFAULT_SCREENSHOT_DIR, SCREENSHOT_POLICIES, ScreenshotManager, set_screenshot_manager
+from selector_cache import DEFAULT_CACHE_PATH, SelectorCache
+from trace_policy import TRACING_POLICIES, TracePolicy
 
-        # ✅ Start tracing
-        await context.tracing.start(screenshots=True, snapshots=True, sources=True)
 
-        page = await context.new_page()
-        yield page  # run the test
+def pytest_addoption(parser):
+    group = parser.getgroup("airbnb", "Airbnb browser options")
+    group.addoption("--headless", action="store_true", default=False,
+                    help="Run Chromium headless")
+    group.addoption("--slow-mo", type=int, default=500,
+                    help="Slow down every Playwright operation by this many ms")
+    group.addoption("--reuse-context", action="store_true", default=False,
+                    help="Reuse one warm browser context across tests, resetting its storage in between")
+    group.addoption("--tracing", choices=list(TRACING_POLICIES), default="off",
+                    help="Tracing policy: off, on-retry (trace reruns of failed tests), "
+                         "on-failure (keep traces of failed tests only), sampled or full")
+    group.addoption("--trace-sample-rate", type=float, default=0.1,
+                    help="Fraction of tests traced with --tracing=sampled")
+    group.addoption("--trace-dir", default="traces", help="Directory for retained traces")
+    group.addoption("--trace-budget-mb", type=float, default=500,
+                    help="Prune the oldest traces once the trace directory exceeds this size")
+    group.addoption("--trace-keep", type=int, default=20, help="Maximum number of traces to keep")
+    group.addoption("--network-profile", choices=list(NETWORK_PROFILES), default="full",
+                    help="Block requests by profile: scrape-minimal, visual or full (no blocking)")
+    group.addoption("--replay", choices=list(REPLAY_MODES), default="off",
+                    help="record: save a HAR and DOM snapshots per test; har / snapshot: replay them offline")
+    group.addoption("--replay-dir", default=DEFAULT_FIXTURES_DIR, help="Directory of the recorded replay fixtures")
+    group.addoption("--instrument", action="store_true", default=False,
+                    help="Time page-object steps and Playwright calls; print a summary and write a JSON Lines log")
+    group.addoption("--instrument-dir", default="instrumentation", help="Directory for the instrumentation logs")
+    group.addoption("--count-round-trips", action="store_true", default=False,
+                    help="Count Playwright round trips per test and method and print them")
+    group.addoption("--enforce-round-trip-budgets", action="store_true", default=False,
+                    help="Fail tests (and round_trip_budget blocks) that go over their round trip budget")
+    group.addoption("--screenshots", choices=list(SCREENSHOT_POLICIES), default="on-error",
+                    help="off, on-error (error states only) or ring (keep the last frames in memory, "
+                         "write them only when the test fails)")
+    group.addoption("--screenshot-dir", default=DEFAULT_SCREENSHOT_DIR, help="Directory for the screenshots")
+    group.addoption("--screenshot-ring-size", type=int, default=8, help="Frames kept in memory with --screenshots=ring")
+    group.addoption("--selector-cache", default=DEFAULT_CACHE_PATH,
+                    help="JSON file remembering which selectors worked (shared by the page objects)")
 
-        # ✅ Save trace
-        await context.tracing.stop(path="trace.zip")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "round_trip_budget(limit): most Playwright round trips the test may make")
+    SelectorCache.set_default_path(config.getoption("selector_cache"))
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    # Expose each phase's report on the test item so fixtures can tell whether the test failed
+    outcome = yield
+    report = outcome.get_result()
+    setattr(item, f"rep_{report.when}", report)
+
+
+@pytest.fixture(scope="session")
+def trace_policy(pytestconfig):
+    return TracePolicy(
+        policy=pytestconfig.getoption("tracing"),
+        trace_dir=pytestconfig.getoption("trace_dir"),
+        sample_rate=pytestconfig.getoption("trace_sample_rate"),
+        max_total_mb=pytestconfig.getoption("trace_budget_mb"),
+        max_files=pytestconfig.getoption("trace_keep")
+    )
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def playwright_instance():
+    # Started once per session instead of once per test
+    p = await async_playwright().start()
+    yield p
+    await p.stop()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def instrumentation(pytestconfig):
+    """The session's step and call timings; page objects pick it up unless given their own."""
+    instrumentation = Instrumentation(pytestconfig.getoption("instrument"), pytestconfig.getoption("instrument_dir"))
+    set_instrumentation(instrumentation)
+    yield instrumentation
+    if instrumentation.enabled:
+        instrumentation.print_summary()
+        path = instrumentation.write_log("pytest")
+        if path:
+            print(f"Instrumentation log written to {path}")
+    set_instrumentation(Instrumentation())
+
+
+@pytest.fixture(autouse=True)
+def round_trips(pytestconfig, request):
+    """Count the test's Playwright round trips and check them against its round_trip_budget marker."""
+    enforce = pytestconfig.getoption("enforce_round_trip_budgets")
+    marker = request.node.get_closest_marker("round_trip_budget")
+    counter = RoundTripCounter(pytestconfig.getoption("count_round_trips") or enforce, enforce)
+    set_round_trip_counter(counter)
+    yield counter
+    set_round_trip_counter(RoundTripCounter())
+    over_budget = marker is not None and counter.enabled and counter.total > marker.args[0]
+    if over_budget:
+        counter.violations.append((request.node.name, counter.total, marker.args[0]))
+    counter.print_summary(f"ROUND TRIPS ({request.node.name})")
+    if enforce and over_budget:
+        raise RoundTripBudgetExceeded(f"{request.node.name}: {counter.total} Playwright round trips "
+                                      f"(budget {marker.args[0]})")
+
+
+def test_failed(node):
+    reports = [getattr(node, f"rep_{when}", None) for when in ("setup", "call")]
+    return any(report is not None and report.failed for report in reports)
+
+
+@pytest.fixture(autouse=True)
+def screenshots(pytestconfig, request):
+    """The test's screenshots; frames kept in memory are written only if the test failed."""
+    manager = ScreenshotManager(
+        policy=pytestconfig.getoption("screenshots"),
+        screenshot_dir=pytestconfig.getoption("screenshot_dir"),
+        ring_size=pytestconfig.getoption("screenshot_ring_size"),
+        run_name=request.node.name
+    )
+    set_screenshot_manager(manager)
+    yield manager
+    set_screenshot_manager(ScreenshotManager())
+    if test_failed(request.node):
+        paths = manager.flush()
+        if paths:
+            print(f"{len(paths)} screenshots of the failed test saved to {manager.run_dir}")
+    else:
+        manager.discard()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session", autouse=True)
+async def results_writer():
+    # Result files are written in the background; make sure they are all on disk at the end
+    yield
+    await close_results_writer()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def browser(playwright_instance, pytestconfig):
+    browser = await playwright_instance.chromium.launch(
+        headless=pytestconfig.getoption("headless"),
+        slow_mo=pytestconfig.getoption("slow_mo")
+    )
+    yield browser
+    await browser.close()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def warm_context(browser, pytestconfig):
+    """A context shared by all tests when --reuse-context is given, otherwise None."""
+    if not pytestconfig.getoption("reuse_context"):
+        yield None
+        return
+
+    context = await browser.new_context()
+    yield context
+    await context.close()
+
+
+async def clear_storage(page):
+    """Clear the localStorage and sessionStorage of the page's origin."""
+    try:
+        await page.evaluate("() => { localStorage.clear(); sessionStorage.clear(); }")
+    except Exception:
+        pass  # page is on an origin without storage (e.g. about:blank)
+
+
+async def reset_context(context):
+    """
+    Reset a reused context to a clean state: no pages, cookies, storage, permissions or routes.
+    Storage can only be cleared from a page on its origin, so the page fixture clears it
+    before closing the test's page; pages a test left open are cleared here.
+    """
+    for page in context.pages:
+        await clear_storage(page)
+        await page.close()
+    await context.clear_cookies()
+    await context.clear_permissions()
+    await context.unroute("**/*")
+
+
+@pytest.fixture
+def network_filter(pytestconfig):
+    """The request filter installed on the test's context; its counters show what was blocked."""
+    return NetworkFilter(pytestconfig.getoption("network_profile"))
+
+
+@pytest.fixture
+def replay(pytestconfig, request):
+    """The test's recorded fixtures (HAR and DOM snapshots), per the --replay mode."""
+    return ReplayFixture(request.node.name, pytestconfig.getoption("replay"), pytestconfig.getoption("replay_dir"))
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def context(browser, warm_context, trace_policy, network_filter, replay, request):
+    # A lightweight per-test context, or the warm one reset to a clean state
+    # (recording and replaying need a context of their own: the HAR is written when it closes)
+    if warm_context is not None and replay.mode == "off":
+        await reset_context(warm_context)
+        context = warm_context
+    else:
+        context = await browser.new_context(**replay.context_options())
+    await network_filter.install(context)
+    await replay.install(context)
+
+    # ✅ Start tracing (if the policy traces this test)
+    tracing = trace_policy.should_trace(getattr(request.node, "execution_count", 1))
+    if tracing:
+        await context.tracing.start(**trace_policy.start_options())
+
+    yield context
+
+    # ✅ Save the trace only if the policy retains it, otherwise just discard it
+    if tracing:
+        if trace_policy.should_retain(test_failed(request.node)):
+            path = trace_policy.trace_path(request.node.nodeid)
+            await context.tracing.stop(path=path)
+            print(f"Trace saved to {path}")
+            trace_policy.prune()
+        else:
+            await context.tracing.stop()
+    if network_filter.profile != "full":
+        network_filter.print_summary()
+    await replay.finish(context)
+    if context is not warm_context:
         await context.close()
-        await browser.close()
\ No newline at end of file
+
+
+@pytest_asyncio.fixture(loop_scope="session")
+async def page(context, warm_context, replay, screenshots, request):
+    page = await context.new_page()
+    replay.attach(page)
+    yield page  # run the test
+    if test_failed(request.node) and not page.is_closed():
+        # The state the test failed in, with the frames leading up to it
+        await screenshots.capture_error(page, "test_failed")
+    await replay.detach(page)
+    if not page.is_closed():
+        if context is warm_context:
+            # The next test reuses the context, so don't leave this origin's storage behind
+            await clear_storage(page)
+        await page.close()
@@ -0,0 +1,12 @@
+import re
+
+UNSAFE_CHARACTERS = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def safe_filename(name, default=""):
+    """
+    Turn a test name, label or URL path into a portable file name: runs of anything
+    but letters, digits, "_", "." and "-" become "_". Leading and trailing "_" and "."
+    are dropped (so the result is never hidden, "." or ".."); default if nothing is left.
+    """
+    return UNSAFE_CHARACTERS.sub("_", name).strip("_.") or default
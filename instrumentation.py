@@ -0,0 +1,312 @@
+import contextvars
+import functools
+import inspect
+import json
+import os
+import time
+from datetime import datetime
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+HISTOGRAM_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+# The innermost step being timed, so calls and nested steps know their parent
+_current_step = contextvars.ContextVar("current_step", default=None)
+
+
+class _NullSpan:
+    """The span used while instrumentation is off: entering and leaving it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_outcome(self, outcome):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """Times one step or Playwright call; recorded in its Instrumentation when it ends."""
+
+    __slots__ = ("instrumentation", "name", "kind", "selector", "attempt", "outcome", "started", "_token")
+
+    def __init__(self, instrumentation, name, kind, selector=None, attempt=None):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.kind = kind
+        self.selector = selector
+        self.attempt = attempt
+        self.outcome = None
+        self.started = None
+        self._token = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        if self.kind == "step":
+            self._token = _current_step.set(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._token is not None:
+            _current_step.reset(self._token)
+        if self.outcome is None:
+            if exc_type is None:
+                self.outcome = "ok"
+            elif exc_type.__name__ == "TimeoutError":
+                self.outcome = "timeout"
+            else:
+                self.outcome = f"error: {exc_type.__name__}"
+        self.instrumentation.record(self.name, self.kind, self.started, self.outcome, self.selector, self.attempt)
+        return False
+
+    def set_outcome(self, outcome):
+        """Set the span's outcome (e.g. "miss") instead of the one derived from exceptions."""
+        self.outcome = outcome
+
+
+class Instrumentation:
+    """
+    Record timing spans of page-object steps and Playwright calls.
+
+    Every span (name, kind, parent step, selector, attempt, start, duration,
+    outcome) goes to an in-memory log and a per-name histogram. summary() shows
+    where the wall time went; write_log() saves the log as JSON Lines.
+    While disabled, span() returns a shared no-op object and page objects use
+    the Playwright page unwrapped, so it costs next to nothing.
+
+    Args:
+        enabled: Whether spans are recorded
+        log_dir: Directory for write_log()
+    """
+
+    def __init__(self, enabled=False, log_dir="instrumentation"):
+        self.enabled = enabled
+        self.log_dir = log_dir
+        self.reset()
+
+    def reset(self):
+        self.events = []
+        self.histogram = {}
+        self.started = time.perf_counter()
+        # Calls per (parent step, method, selector), for the attempt number of repeated calls
+        self._attempts = {}
+
+    def span(self, name, kind="step", selector=None, attempt=None):
+        """A context manager timing one step (or call, with kind="call")."""
+        if not self.enabled:
+            return NULL_SPAN
+        if attempt is None and kind == "call":
+            key = (_current_step.get(), name, selector)
+            attempt = self._attempts[key] = self._attempts.get(key, 0) + 1
+        return Span(self, name, kind, selector, attempt)
+
+    def record(self, name, kind, started, outcome, selector=None, attempt=None, duration_ms=None):
+        """Record a finished span that started at perf_counter() value started."""
+        if not self.enabled:
+            return
+        if duration_ms is None:
+            duration_ms = (time.perf_counter() - started) * 1000
+        self.events.append({
+            "name": name,
+            "kind": kind,
+            "step": _current_step.get(),
+            "selector": selector,
+            "attempt": attempt,
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(duration_ms, 3),
+            "outcome": outcome
+        })
+        entry = self.histogram.get((kind, name))
+        if entry is None:
+            entry = self.histogram[(kind, name)] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                                    "buckets": [0] * (len(HISTOGRAM_BUCKETS_MS) + 1)}
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        bucket = 0
+        while bucket < len(HISTOGRAM_BUCKETS_MS) and duration_ms > HISTOGRAM_BUCKETS_MS[bucket]:
+            bucket += 1
+        entry["buckets"][bucket] += 1
+
+    @staticmethod
+    def _percentile(entry, percent):
+        """Upper bound of the histogram bucket holding the given percentile."""
+        target = entry["count"] * percent / 100
+        seen = 0
+        for bucket, count in enumerate(entry["buckets"]):
+            seen += count
+            if seen >= target and count:
+                return HISTOGRAM_BUCKETS_MS[bucket] if bucket < len(HISTOGRAM_BUCKETS_MS) else entry["max_ms"]
+        return entry["max_ms"]
+
+    def summary(self):
+        """Return the histogram rows (kind, name, count, total, mean, p50, p95, max), most total time first."""
+        rows = []
+        for (kind, name), entry in self.histogram.items():
+            rows.append({
+                "kind": kind,
+                "name": name,
+                "count": entry["count"],
+                "total_ms": round(entry["total_ms"], 1),
+                "mean_ms": round(entry["total_ms"] / entry["count"], 1),
+                "p50_ms": self._percentile(entry, 50),
+                "p95_ms": self._percentile(entry, 95),
+                "max_ms": round(entry["max_ms"], 1)
+            })
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def print_summary(self, limit=25):
+        """Print where the wall time went: top-level steps, then the costliest steps and calls."""
+        if not self.enabled:
+            return
+        wall_ms = (time.perf_counter() - self.started) * 1000
+        top_level_ms = sum(event["duration_ms"] for event in self.events
+                           if event["kind"] == "step" and event["step"] is None)
+        calls = sum(1 for event in self.events if event["kind"] == "call")
+        print(f"\n--- TIMING SUMMARY ({wall_ms / 1000:.2f}s wall, {top_level_ms / 1000:.2f}s in top-level steps, "
+              f"{calls} Playwright calls) ---")
+        print(f"{'kind':<5} {'name':<40} {'count':>6} {'total ms':>10} {'mean':>8} {'p50<=':>7} {'p95<=':>7} {'max':>8}")
+        for row in self.summary()[:limit]:
+            print(f"{row['kind']:<5} {row['name'][:40]:<40} {row['count']:>6} {row['total_ms']:>10.1f} "
+                  f"{row['mean_ms']:>8.1f} {row['p50_ms']:>7} {row['p95_ms']:>7} {row['max_ms']:>8.1f}")
+        print("------------------------------\n")
+
+    def write_log(self, name="run"):
+        """Write the recorded spans as JSON Lines and return the file path (None if nothing was recorded)."""
+        if not self.events:
+            return None
+        os.makedirs(self.log_dir, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        path = os.path.join(self.log_dir, f"{name}_{timestamp}_{os.getpid()}.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for event in self.events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return path
+
+
+# Page objects created without an explicit Instrumentation use this one (off by default)
+_active = Instrumentation()
+
+
+def get_instrumentation():
+    return _active
+
+
+def set_instrumentation(instrumentation):
+    """Make instrumentation the default for page objects created from now on."""
+    global _active
+    _active = instrumentation
+
+
+def timed_step(name=None):
+    """
+    Decorate a page-object method (sync or async, not async generators) to record
+    it as a step span named name (default: the method name).
+    """
+    def decorator(method):
+        step_name = name or method.__name__
+        if inspect.iscoroutinefunction(method):
+            @functools.wraps(method)
+            async def async_wrapper(self, *args, **kwargs):
+                if not self.instrumentation.enabled:
+                    return await method(self, *args, **kwargs)
+                with self.instrumentation.span(step_name):
+                    return await method(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not self.instrumentation.enabled:
+                return method(self, *args, **kwargs)
+            with self.instrumentation.span(step_name):
+                return method(self, *args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+# Playwright objects whose async methods are timed when returned from a timed call
+_WRAPPED_TYPES = ("Page", "ElementHandle", "JSHandle", "Locator", "FrameLocator")
+
+
+def _unwrap(value):
+    """Replace InstrumentedHandles (also inside lists, tuples and dicts) with the Playwright objects."""
+    if isinstance(value, InstrumentedHandle):
+        return value._target
+    if isinstance(value, list):
+        return [_unwrap(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_unwrap(item) for item in value)
+    if isinstance(value, dict):
+        return {key: _unwrap(item) for key, item in value.items()}
+    return value
+
+
+def _wrap(value, instrumentation, counter):
+    if type(value).__name__ in _WRAPPED_TYPES:
+        return InstrumentedHandle(value, instrumentation, counter)
+    if isinstance(value, list) and value and type(value[0]).__name__ in _WRAPPED_TYPES:
+        return [InstrumentedHandle(item, instrumentation, counter) for item in value]
+    return value
+
+
+class InstrumentedHandle:
+    """
+    Wrap a Playwright Page, ElementHandle or Locator so every async method call is
+    recorded as a "call" span (named e.g. "ElementHandle.query_selector", with its
+    selector) and counted as a round trip by the RoundTripCounter, if given.
+    Handles and locators it returns are wrapped too; wrapped objects are unwrapped
+    again when passed back into Playwright.
+    """
+
+    __slots__ = ("_target", "_instrumentation", "_counter", "_type")
+
+    def __init__(self, target, instrumentation, counter=None):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_instrumentation", instrumentation)
+        object.__setattr__(self, "_counter", counter if counter is not None and counter.enabled else None)
+        object.__setattr__(self, "_type", type(target).__name__)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if name.startswith("_"):
+            return attribute
+        instrumentation = self._instrumentation
+        counter = self._counter
+        if not callable(attribute):
+            return _wrap(attribute, instrumentation, counter)  # e.g. Locator.first
+        call_name = f"{self._type}.{name}"
+
+        if inspect.iscoroutinefunction(attribute):
+            async def timed_call(*args, **kwargs):
+                if counter is not None:
+                    counter.count(call_name)
+                selector = args[0] if args and isinstance(args[0], str) else kwargs.get("selector")
+                with instrumentation.span(call_name, kind="call", selector=selector):
+                    result = await attribute(*_unwrap(args), **_unwrap(kwargs))
+                return _wrap(result, instrumentation, counter)
+            return timed_call
+
+        def call(*args, **kwargs):
+            # Sync methods (locator(), on(), expect_response(), ...) make no round trip
+            return _wrap(attribute(*_unwrap(args), **_unwrap(kwargs)), instrumentation, counter)
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f"Instrumented({self._target!r})"
@@ -0,0 +1,127 @@
+from listing_table import ListingTable
+from price_parser import parse_price
+from ranking import BEST_VALUE, BEST_VALUE_FIXED, RankingEngine
+
+FAMILY_KEYWORDS = ["family", "kid", "child", "children", "spacious", "apartment"]
+
+# A listing must be rated above this to count as family-friendly
+FAMILY_MIN_RATING = 4.7
+
+
+def best_value_score(rating, price_value):
+    """
+    Score a single listing by rating and price against the fixed price range
+    (higher rating and lower price is better). Streams use it, as the prices of
+    listings still to come are unknown; analyze_listings ranks against the observed ones.
+
+    Returns None for listings with no rating or no price.
+    """
+    if not rating or price_value is None:
+        return None
+
+    # 70% rating out of 5, 30% price normalized between 300-1000 (typical Tel Aviv prices)
+    return BEST_VALUE_FIXED.score_one({"rating": rating, "price_value": price_value})
+
+
+def rank_best_value(listings, formula=BEST_VALUE):
+    """
+    Rank the rated and priced listings with a RankingEngine (BEST_VALUE by default,
+    which normalizes prices against the observed ones), among those priced in the
+    currency most of them use.
+
+    Returns (best listing, score, listings left out for their currency);
+    (None, None, 0) if no listing has both a rating and a price.
+    """
+    candidates = {}
+    for listing in listings:
+        if listing.get("rating") and listing.get("price_value") is not None:
+            currency = listing.get("currency") or parse_price(listing.get("price")).currency
+            candidates.setdefault(currency, []).append(listing)
+    if not candidates:
+        return None, None, 0
+    main = max(candidates.values(), key=len)
+    skipped = sum(map(len, candidates.values())) - len(main)
+    top = RankingEngine(formula).top_k_indices(ListingTable(main), 1)
+    if not top:
+        return None, None, skipped
+    score, index = top[0]
+    return main[index], score, skipped
+
+
+def is_family_friendly(listing):
+    """Check for family-friendly indicators in the listing name."""
+    name = (listing.get("name") or "").lower()
+    return any(keyword in name for keyword in FAMILY_KEYWORDS)
+
+
+class ListingAggregator:
+    """
+    Compute the highest-rated, cheapest, best-value and family-friendly listings
+    in a single pass over plain listing dicts (as returned by
+    SearchResultsPage.extract_listing_cards), keeping only the current winners, so
+    streams of any length use constant memory. The best value is scored with the
+    fixed price range (see best_value_score).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.highest_rated = None
+        self.cheapest = None
+        self.best_value = None
+        self.best_value_score = 0
+        self.family_friendly = None
+
+    def add(self, listing):
+        """Fold one listing into the running results."""
+        self.count += 1
+        rating = listing.get("rating")
+        price_value = listing.get("price_value")
+
+        if rating and (self.highest_rated is None or rating > self.highest_rated["rating"]):
+            self.highest_rated = listing
+
+        if price_value is not None and (self.cheapest is None or price_value < self.cheapest["price_value"]):
+            self.cheapest = listing
+
+        if rating and rating > FAMILY_MIN_RATING and is_family_friendly(listing):
+            if self.family_friendly is None or rating > self.family_friendly["rating"]:
+                self.family_friendly = listing
+
+        score = best_value_score(rating, price_value)
+        if score is not None and score > self.best_value_score:
+            self.best_value_score = score
+            self.best_value = listing
+
+    def results(self):
+        """Return the current results as a dictionary."""
+        return {
+            "count": self.count,
+            "highest_rated": self.highest_rated,
+            "cheapest": self.cheapest,
+            "best_value": self.best_value,
+            "family_friendly": self.family_friendly
+        }
+
+
+def analyze_listings(listings):
+    """
+    Run every analysis over a list of listings and return the results dictionary.
+
+    As the whole batch is at hand, the best value is ranked against the observed
+    prices (see rank_best_value); "best_value_skipped" counts the listings left out
+    because they are priced in another currency.
+    """
+    aggregator = ListingAggregator()
+    for listing in listings:
+        aggregator.add(listing)
+    results = aggregator.results()
+    results["best_value"], _, results["best_value_skipped"] = rank_best_value(listings)
+    return results
+
+
+async def analyze_listing_stream(listings):
+    """Run every analysis over an async iterable of listings as they arrive."""
+    aggregator = ListingAggregator()
+    async for listing in listings:
+        aggregator.add(listing)
+    return aggregator.results()
@@ -0,0 +1,206 @@
+import heapq
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the table falls back to array/heapq
+    np = None
+
+from price_parser import parse_price
+
+# Numeric columns and their array typecodes; missing values are NaN (floats) or -1 (counts)
+NUMERIC_COLUMNS = {"price_value": "d", "rating": "d", "review_count": "q"}
+
+
+class Listing:
+    """A compact listing record with parsed numeric fields."""
+
+    __slots__ = ("listing_id", "name", "price", "price_value", "currency", "rating", "review_count", "url")
+
+    def __init__(self, listing_id=None, name=None, price=None, price_value=None, currency=None,
+                 rating=None, review_count=None, url=None):
+        self.listing_id = listing_id
+        self.name = name
+        self.price = price
+        self.price_value = price_value
+        self.currency = currency
+        self.rating = rating
+        self.review_count = review_count
+        self.url = url
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a Listing from a listing dict (as produced by SearchResultsPage)."""
+        return cls(
+            listing_id=data.get("listing_id"),
+            name=data.get("name"),
+            price=data.get("price"),
+            price_value=data.get("price_value"),
+            currency=data.get("currency") or parse_price(data.get("price")).currency,
+            rating=data.get("rating"),
+            review_count=data.get("review_count"),
+            url=data.get("url")
+        )
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"Listing({self.listing_id!r}, {self.name!r}, price={self.price_value}, rating={self.rating})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Listing):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+
+class ListingTable:
+    """
+    A column-oriented store for large numbers of listings.
+
+    Numeric columns (price_value, rating, review_count) are kept in typed arrays,
+    so ranking, filtering and top-k run as vectorized NumPy operations when NumPy
+    is installed (and as plain loops over the arrays otherwise). Text columns are
+    plain lists.
+    """
+
+    TEXT_COLUMNS = ("listing_id", "name", "price", "currency", "url")
+
+    def __init__(self, listings=()):
+        self._numeric = {name: array(typecode) for name, typecode in NUMERIC_COLUMNS.items()}
+        self._text = {name: [] for name in self.TEXT_COLUMNS}
+        self.extend(listings)
+
+    def __len__(self):
+        return len(self._text["listing_id"])
+
+    def append(self, listing):
+        """Add a Listing or a listing dict."""
+        if isinstance(listing, dict):
+            listing = Listing.from_dict(listing)
+        for name in self.TEXT_COLUMNS:
+            self._text[name].append(getattr(listing, name))
+        price_value = listing.price_value
+        rating = listing.rating
+        review_count = listing.review_count
+        self._numeric["price_value"].append(math.nan if price_value is None else float(price_value))
+        self._numeric["rating"].append(math.nan if rating is None else float(rating))
+        self._numeric["review_count"].append(-1 if review_count is None else int(review_count))
+
+    def extend(self, listings):
+        for listing in listings:
+            self.append(listing)
+
+    def row(self, index):
+        """Return the listing at index as a Listing."""
+        values = {name: column[index] for name, column in self._text.items()}
+        price_value = self._numeric["price_value"][index]
+        rating = self._numeric["rating"][index]
+        review_count = self._numeric["review_count"][index]
+        values["price_value"] = None if math.isnan(price_value) else price_value
+        values["rating"] = None if math.isnan(rating) else rating
+        values["review_count"] = None if review_count < 0 else review_count
+        return Listing(**values)
+
+    def rows(self, indices=None):
+        return [self.row(index) for index in (range(len(self)) if indices is None else indices)]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def column(self, name):
+        """Return a column: a NumPy array for numeric columns if NumPy is available."""
+        if name in self._numeric:
+            if np is not None:
+                # A copy, so the array can still grow (arrays exporting their buffer can't be resized)
+                return np.array(self._numeric[name], dtype=self._numeric[name].typecode)
+            return self._numeric[name]
+        return self._text[name]
+
+    def _valid_mask(self, name):
+        values = self.column(name)
+        if np is not None:
+            return ~np.isnan(values) if name != "review_count" else values >= 0
+        if name == "review_count":
+            return [value >= 0 for value in values]
+        return [not math.isnan(value) for value in values]
+
+    def filter_indices(self, min_rating=None, max_price=None, min_price=None, min_reviews=None, currency=None):
+        """Return the indices of the listings matching every given condition (missing values never match)."""
+        if np is not None:
+            mask = np.ones(len(self), dtype=bool)
+            rating = self.column("rating")
+            price = self.column("price_value")
+            if min_rating is not None:
+                mask &= rating >= min_rating
+            if max_price is not None:
+                mask &= price <= max_price
+            if min_price is not None:
+                mask &= price >= min_price
+            if min_reviews is not None:
+                mask &= self.column("review_count") >= min_reviews
+            if currency is not None:
+                mask &= np.array(self._text["currency"], dtype=object) == currency
+            return np.flatnonzero(mask).tolist()
+
+        indices = []
+        rating = self._numeric["rating"]
+        price = self._numeric["price_value"]
+        reviews = self._numeric["review_count"]
+        for index in range(len(self)):
+            if min_rating is not None and not rating[index] >= min_rating:
+                continue
+            if max_price is not None and not price[index] <= max_price:
+                continue
+            if min_price is not None and not price[index] >= min_price:
+                continue
+            if min_reviews is not None and not reviews[index] >= min_reviews:
+                continue
+            if currency is not None and self._text["currency"][index] != currency:
+                continue
+            indices.append(index)
+        return indices
+
+    def filter(self, **conditions):
+        """Return a new ListingTable with the listings matching the conditions (see filter_indices)."""
+        return ListingTable(self.rows(self.filter_indices(**conditions)))
+
+    def rank_indices(self, name, descending=True):
+        """Return the indices of the listings with a value in column name, sorted by it (ties keep insertion order)."""
+        values = self.column(name)
+        valid = self._valid_mask(name)
+        if np is not None:
+            indices = np.flatnonzero(valid)
+            keys = -values[indices] if descending else values[indices]
+            return indices[np.lexsort((indices, keys))].tolist()
+        indices = [index for index, ok in enumerate(valid) if ok]
+        return sorted(indices, key=values.__getitem__, reverse=descending)
+
+    def top_k_indices(self, name, k, largest=True):
+        """
+        Return the indices of the k listings with the largest (or smallest) values in
+        column name, best first (ties keep insertion order).
+        """
+        values = self.column(name)
+        valid = self._valid_mask(name)
+        if np is not None:
+            indices = np.flatnonzero(valid)
+            if len(indices) == 0 or k <= 0:
+                return []
+            keys = -values[indices] if largest else values[indices]
+            if k < len(indices):
+                # Partial selection: keep everything up to the k-th key (ties included),
+                # so only those candidates are sorted
+                kth = np.partition(keys, k - 1)[k - 1]
+                candidates = keys <= kth
+                indices, keys = indices[candidates], keys[candidates]
+            return indices[np.lexsort((indices, keys))][:k].tolist()
+        candidates = (index for index, ok in enumerate(valid) if ok)
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(k, candidates, key=values.__getitem__)
+
+    def top_k(self, name, k, largest=True):
+        """Return the k best listings by column name as Listing records."""
+        return self.rows(self.top_k_indices(name, k, largest))
@@ -0,0 +1,101 @@
+from collections import Counter
+
+# URL fragments of analytics/tracking requests
+TRACKER_PATTERNS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "facebook.net",
+    "facebook.com/tr",
+    "hotjar.com",
+    "sentry.io",
+    "branch.io",
+    "/tracking/",
+    "/api/v2/logging",
+    "/api/v3/Logging",
+    "/marketing_event_tracking",
+]
+
+# URL fragments of map tiles and map scripts
+MAP_PATTERNS = [
+    "maps.googleapis.com",
+    "maps.gstatic.com",
+    "/maps/vt",
+    "/maps/api/js",
+    "mapbox.com",
+]
+
+# What each profile blocks: Playwright resource types, and URL pattern groups
+NETWORK_PROFILES = {
+    # Only what SearchResultsPage needs: documents, scripts, styles (for card layout) and XHR
+    "scrape-minimal": {
+        "resource_types": ["image", "media", "font"],
+        "url_patterns": {"tracker": TRACKER_PATTERNS, "map": MAP_PATTERNS},
+    },
+    # Keeps the page looking right for screenshots, drops trackers and video
+    "visual": {
+        "resource_types": ["media"],
+        "url_patterns": {"tracker": TRACKER_PATTERNS},
+    },
+    "full": {
+        "resource_types": [],
+        "url_patterns": {},
+    },
+}
+
+
+class NetworkFilter:
+    """
+    Block requests according to a named profile and count what was blocked.
+
+    Install it on a browser context (or a single page) with `await install(target)`.
+    """
+
+    def __init__(self, profile="scrape-minimal"):
+        if profile not in NETWORK_PROFILES:
+            raise ValueError(f"Unknown network profile: {profile} (expected one of {', '.join(NETWORK_PROFILES)})")
+        self.profile = profile
+        self.resource_types = set(NETWORK_PROFILES[profile]["resource_types"])
+        self.url_patterns = NETWORK_PROFILES[profile]["url_patterns"]
+        self.blocked = Counter()
+        self.allowed = 0
+
+    def block_reason(self, resource_type, url):
+        """Return why a request should be blocked (resource type or pattern group), or None to allow it."""
+        if resource_type in self.resource_types:
+            return resource_type
+        for group, patterns in self.url_patterns.items():
+            if any(pattern in url for pattern in patterns):
+                return group
+        return None
+
+    async def install(self, target):
+        """Route every request of a BrowserContext or Page through this filter."""
+        if self.profile == "full":
+            return  # nothing to block, so don't pay for routing
+        await target.route("**/*", self._handle_route)
+
+    async def _handle_route(self, route):
+        request = route.request
+        reason = self.block_reason(request.resource_type, request.url)
+        if reason:
+            self.blocked[reason] += 1
+            await route.abort()
+        else:
+            self.allowed += 1
+            await route.continue_()
+
+    def summary(self):
+        """Return a dictionary with the number of allowed and blocked requests (by reason)."""
+        return {
+            "profile": self.profile,
+            "allowed": self.allowed,
+            "blocked": sum(self.blocked.values()),
+            "blocked_by_reason": dict(self.blocked)
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.blocked.items())) or "none"
+        print(f"Network profile '{self.profile}': {summary['allowed']} allowed, "
+              f"{summary['blocked']} blocked ({reasons})")
@@ -1,7 +1,96 @@
+import time
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from instrumentation import InstrumentedHandle, get_instrumentation, timed_step
+from round_trips import get_round_trip_counter
+from screenshots import get_screenshot_manager
+
+# Counts the matches of every candidate selector in one round trip, with basic
+# shape stats (visible matches, median size of a sample) and the in-page time
+# each query took. Invalid selectors report an error instead of failing the probe.
+PROBE_SELECTORS_JS = '''
+    ({selectors, sample}) => {
+        const median = values => {
+            if (values.length === 0) return 0;
+            const sorted = values.slice().sort((a, b) => a - b);
+            return sorted[Math.floor(sorted.length / 2)];
+        };
+        return selectors.map(selector => {
+            const started = performance.now();
+            let elements;
+            try {
+                elements = document.querySelectorAll(selector);
+            } catch (e) {
+                return {selector, count: 0, visible: 0, width: 0, height: 0,
+                        ms: performance.now() - started, error: String(e)};
+            }
+            const widths = [];
+            const heights = [];
+            let visible = 0;
+            // Read the geometry of a sample only, so long lists stay cheap
+            for (let i = 0; i < elements.length && i < sample; i++) {
+                const rect = elements[i].getBoundingClientRect();
+                if (rect.width > 0 && rect.height > 0) {
+                    visible++;
+                    widths.push(rect.width);
+                    heights.push(rect.height);
+                }
+            }
+            return {selector, count: elements.length, visible, width: median(widths), height: median(heights),
+                    ms: performance.now() - started, error: null};
+        });
+    }
+'''
+
+
 class BasePage:
-    def __init__(self, page):
+    # Upper bounds (in ms) for the event-driven waits, by kind of signal
+    WAIT_TIMEOUTS = {
+        "dom": 5000,
+        "condition": 5000,
+        "stepper": 3000,
+        "url": 15000,
+        "response": 15000
+    }
+
+    # URL fragments of the requests that deliver search results (GraphQL/XHR)
+    SEARCH_RESPONSE_PATTERNS = ["/api/v3/StaysSearch", "/api/v3/ExploreSearch", "/api/v2/explore_tabs"]
+
+    def __init__(self, page, wait_timeouts=None, instrumentation=None, screenshots=None):
+        # Step and Playwright call timings (see instrumentation) and round trip counts (see round_trips);
+        # when both are off the page is used as is
+        self.instrumentation = instrumentation or get_instrumentation()
+        self.round_trips = get_round_trip_counter()
+        if self.instrumentation.enabled or self.round_trips.enabled:
+            page = InstrumentedHandle(page, self.instrumentation, self.round_trips)
         self.page = page
+        # Diagnostic screenshots, per the manager's policy (see screenshots)
+        self.screenshots = screenshots or get_screenshot_manager()
+        self.wait_timeouts = dict(self.WAIT_TIMEOUTS, **(wait_timeouts or {}))
+        # One entry per wait: step name, kind of signal, time waited and outcome
+        self.wait_report = []
+
+    def span(self, name, selector=None, attempt=None):
+        """A context manager timing one step of a page object (a no-op while instrumentation is off)."""
+        return self.instrumentation.span(name, selector=selector, attempt=attempt)
+
+    def round_trip_budget(self, limit, label="block"):
+        """
+        A context manager failing (with RoundTripBudgetExceeded, if budgets are enforced)
+        when the code inside it makes more than limit Playwright round trips.
+        """
+        return self.round_trips.budget(limit, label)
 
+    async def screenshot(self, label):
+        """A diagnostic screenshot; only kept (in memory) under the "ring" screenshot policy."""
+        await self.screenshots.capture(self.page, label)
+
+    async def error_screenshot(self, label):
+        """A screenshot of an error state, written to the run's screenshot directory unless screenshots are off."""
+        return await self.screenshots.capture_error(self.page, label)
+
+    @timed_step()
     async def go_to(self, url: str):
         await self.page.goto(url)
 
@@ -16,3 +105,124 @@ class BasePage:
 
     async def wait_for_selector(self, selector: str):
         await self.page.wait_for_selector(selector)
+
+    def _record_wait(self, step, kind, started, outcome):
+        waited_ms = (time.perf_counter() - started) * 1000
+        self.instrumentation.record(step, "wait", started, outcome, duration_ms=waited_ms)
+        self.wait_report.append({
+            "step": step,
+            "kind": kind,
+            "waited_ms": round(waited_ms, 1),
+            "outcome": outcome
+        })
+        return outcome == "ok"
+
+    async def wait_for_dom(self, step, selector, state="visible", timeout=None):
+        """Wait until the selector reaches the given state. Returns False on timeout."""
+        started = time.perf_counter()
+        try:
+            await self.page.wait_for_selector(selector, state=state, timeout=timeout or self.wait_timeouts["dom"])
+            outcome = "ok"
+        except PlaywrightTimeoutError:
+            outcome = "timeout"
+        return self._record_wait(step, "dom", started, outcome)
+
+    async def wait_for_condition(self, step, expression, arg=None, timeout=None):
+        """Wait until a JavaScript expression/function is truthy in the page. Returns False on timeout."""
+        started = time.perf_counter()
+        try:
+            await self.page.wait_for_function(expression, arg=arg, timeout=timeout or self.wait_timeouts["condition"])
+            outcome = "ok"
+        except PlaywrightTimeoutError:
+            outcome = "timeout"
+        return self._record_wait(step, "condition", started, outcome)
+
+    async def wait_for_url_change(self, step, old_url, timeout=None):
+        """Wait until the page URL differs from old_url. Returns False on timeout."""
+        started = time.perf_counter()
+        try:
+            await self.page.wait_for_url(lambda url: url != old_url, wait_until="commit",
+                                         timeout=timeout or self.wait_timeouts["url"])
+            outcome = "ok"
+        except PlaywrightTimeoutError:
+            outcome = "timeout"
+        return self._record_wait(step, "url", started, outcome)
+
+    async def get_stepper_value(self, stepper):
+        """Read the current value of a guest stepper (e.g. "adults", "children")."""
+        try:
+            value = await self.page.locator(f'[data-testid="stepper-{stepper}-value"]').first.text_content(timeout=1000)
+            return value.strip() if value else None
+        except Exception:
+            return None
+
+    async def wait_for_stepper_change(self, step, stepper, old_value, timeout=None):
+        """Wait until a guest stepper shows a value other than old_value. Returns False on timeout."""
+        started = time.perf_counter()
+        try:
+            await self.page.wait_for_function(
+                '''({selector, oldValue}) => {
+                    const el = document.querySelector(selector);
+                    return el !== null && el.textContent.trim() !== oldValue;
+                }''',
+                arg={"selector": f'[data-testid="stepper-{stepper}-value"]', "oldValue": old_value},
+                timeout=timeout or self.wait_timeouts["stepper"]
+            )
+            outcome = "ok"
+        except PlaywrightTimeoutError:
+            outcome = "timeout"
+        return self._record_wait(step, "stepper", started, outcome)
+
+    async def probe_selectors(self, selectors, sample=20):
+        """
+        Probe every candidate selector in a single evaluate call.
+
+        Returns one dict per selector, in order: count (matches), visible (visible
+        matches among the first sample), width and height (median size of those),
+        ms (in-page query time) and error (for invalid selectors). Returns an empty
+        list if the page can't be evaluated.
+        """
+        try:
+            return await self.page.evaluate(PROBE_SELECTORS_JS, {"selectors": list(selectors), "sample": sample})
+        except Exception as e:
+            print(f"Error probing selectors: {e}")
+            return []
+
+    def is_search_response(self, response):
+        """Check whether a network response carries search results."""
+        return any(pattern in response.url for pattern in self.SEARCH_RESPONSE_PATTERNS)
+
+    async def run_and_wait_for_response(self, step, action, predicate=None, timeout=None):
+        """
+        Run an async action (e.g. a click) and wait for the response it triggers.
+
+        Defaults to waiting for the search results response. Returns False on timeout;
+        errors raised by the action itself are propagated.
+        """
+        started = time.perf_counter()
+        action_failed = False
+        try:
+            async with self.page.expect_response(predicate or self.is_search_response,
+                                                 timeout=timeout or self.wait_timeouts["response"]):
+                try:
+                    await action()
+                except Exception:
+                    action_failed = True
+                    raise
+            outcome = "ok"
+        except PlaywrightTimeoutError:
+            # Only the response wait timing out means the response never came; a timeout
+            # of the action itself (e.g. a click on a missing element) is its own error
+            if action_failed:
+                self._record_wait(step, "response", started, "error")
+                raise
+            outcome = "timeout"
+        return self._record_wait(step, "response", started, outcome)
+
+    def print_wait_report(self):
+        """Print how long each step actually waited."""
+        total_ms = sum(entry["waited_ms"] for entry in self.wait_report)
+        print(f"\n--- WAIT REPORT ({len(self.wait_report)} waits, {total_ms / 1000:.2f}s total) ---")
+        for entry in self.wait_report:
+            print(f"{entry['waited_ms']:>9.1f} ms  {entry['kind']:<9} {entry['outcome']:<7} {entry['step']}")
+        print("------------------------------\n")
@@ -1,14 +1,80 @@
+import time
+
+from instrumentation import timed_step
 from pages.base_page import BasePage
 from datetime import datetime, timedelta
+from urllib.parse import parse_qs, quote, urlencode, urlparse
 
 class HomePage(BasePage):
+    DEFAULT_BASE_URL = "https://www.airbnb.com"
+
+    # Calendar days that are currently selected (check-in/check-out)
+    SELECTED_DAY_SELECTOR = 'td[aria-selected="true"], button[aria-pressed="true"], [data-is-day-selected="true"]'
+
+    GUESTS_BUTTON_SELECTOR = 'button:has-text("Add guests"), [data-testid="structured-search-input-field-guests-button"]'
+
+    @timed_step()
     async def accept_cookies_if_present(self):
         try:
             await self.page.get_by_role("button", name="Accept").click(timeout=3000)
         except:
             pass  # no cookie popup, continue
 
-    async def search_apartment(self, location: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, children: int = 0):
+    def build_search_url(self, location: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, children: int = 0):
+        """Build the /s/<location>/homes search URL. Dates are expected as YYYY-MM-DD."""
+        if checkin_date and checkout_date:
+            checkin = datetime.strptime(checkin_date, "%Y-%m-%d")
+            checkout = datetime.strptime(checkout_date, "%Y-%m-%d")
+            if checkout <= checkin:
+                raise ValueError(f"Checkout date {checkout_date} must be after checkin date {checkin_date}")
+
+        # Stay on the current Airbnb domain (and locale) if we're already on it
+        base_url = self.DEFAULT_BASE_URL
+        current = urlparse(self.page.url)
+        if current.scheme in ("http", "https") and current.netloc:
+            base_url = f"{current.scheme}://{current.netloc}"
+
+        params = {"query": location}
+        if checkin_date:
+            params["checkin"] = checkin_date
+        if checkout_date:
+            params["checkout"] = checkout_date
+        params["adults"] = adults
+        params["children"] = children
+        locale = parse_qs(current.query).get("locale")
+        if locale:
+            params["locale"] = locale[0]
+
+        path_location = quote(location.replace(" ", "-"))
+        return f"{base_url}/s/{path_location}/homes?{urlencode(params)}"
+
+    @timed_step()
+    async def search_apartment(self, location: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, children: int = 0, mode: str = "url"):
+        """
+        Search for apartments.
+
+        mode="url" (default) navigates straight to the search results URL.
+        mode="ui" drives the search form and is meant for form-regression tests.
+        """
+        if mode == "url":
+            await self.search_apartment_by_url(location, checkin_date, checkout_date, adults, children)
+        elif mode == "ui":
+            await self.search_apartment_via_ui(location, checkin_date, checkout_date, adults, children)
+        else:
+            raise ValueError(f"Unknown search mode: {mode}")
+
+    @timed_step()
+    async def search_apartment_by_url(self, location: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, children: int = 0):
+        """Search by navigating directly to the search results URL, bypassing the form."""
+        url = self.build_search_url(location, checkin_date, checkout_date, adults, children)
+        print(f"Navigating directly to search results: {url}")
+        started = time.perf_counter()
+        await self.page.goto(url, wait_until="domcontentloaded")
+        self._record_wait("search results navigation", "navigation", started, "ok")
+
+    @timed_step()
+    async def search_apartment_via_ui(self, location: str, checkin_date: str = None, checkout_date: str = None, adults: int = 2, children: int = 0):
+        """Search by filling in the search form (location, calendar, guests)."""
         await self.accept_cookies_if_present()
 
         # Fill in location
@@ -18,7 +84,7 @@ class HomePage(BasePage):
         await self.page.locator('div[role="option"] >> text=Tel Aviv').first.click()
 
         # Take screenshot before opening calendar
-        await self.page.screenshot(path="before_calendar.png")
+        await self.screenshot("before_calendar")
         
         print("📅 Working with calendar...")
         try:
@@ -31,11 +97,11 @@ class HomePage(BasePage):
                 if await dates_tab.count() > 0:
                     await dates_tab.click()
                     print("Clicked on Dates tab")
-                    await self.page.wait_for_timeout(1000)
+                    await self.wait_for_dom("calendar visible", 'table td button')
             except Exception as e:
                 print(f"Note: Dates tab might already be selected: {e}")
             
-            await self.page.screenshot(path="calendar_view.png")
+            await self.screenshot("calendar_view")
             
             # Try to identify specific days in the calendar by their text content
             # Based on your screenshot, we can see May 17 and other dates clearly
@@ -68,8 +134,8 @@ class HomePage(BasePage):
                 except Exception as e2:
                     print(f"Fallback also failed: {e2}")
             
-            await self.page.wait_for_timeout(2000)
-            await self.page.screenshot(path="after_first_date.png")
+            await self.wait_for_dom("first date selected", self.SELECTED_DAY_SELECTOR, state="attached")
+            await self.screenshot("after_first_date")
             
             # Now, try to select a second date (about a week later)
             try:
@@ -102,8 +168,12 @@ class HomePage(BasePage):
                 except Exception as e2:
                     print(f"Second date fallback also failed: {e2}")
             
-            await self.page.wait_for_timeout(2000)
-            await self.page.screenshot(path="after_second_date.png")
+            await self.wait_for_condition(
+                "second date selected",
+                '(selector) => document.querySelectorAll(selector).length >= 2',
+                arg=self.SELECTED_DAY_SELECTOR
+            )
+            await self.screenshot("after_second_date")
             
             # Now look for a button to confirm the date selection
             try:
@@ -124,11 +194,11 @@ class HomePage(BasePage):
             except Exception as e:
                 print(f"Error confirming date selection: {e}")
             
-            await self.page.wait_for_timeout(2000)
+            await self.wait_for_dom("dates confirmed", self.GUESTS_BUTTON_SELECTOR)
             
         except Exception as e:
             print(f"Calendar interaction error: {e}")
-            await self.page.screenshot(path="calendar_error.png")
+            await self.error_screenshot("calendar_error")
 
         
 
@@ -152,8 +222,8 @@ class HomePage(BasePage):
                     print("Clicked on guests field with testid")
             
             # Wait for guest menu to appear
-            await self.page.wait_for_timeout(2000)
-            await self.page.screenshot(path="guest_menu_open.png")
+            await self.wait_for_dom("guest menu open", '[data-testid="stepper-adults-increase-button"]')
+            await self.screenshot("guest_menu_open")
             
             # Reset to a known state first - set adults to 0 if possible
             try:
@@ -163,8 +233,9 @@ class HomePage(BasePage):
                 # Click it multiple times to reset to 0 or minimum value
                 for _ in range(5):  # Try up to 5 times to ensure we get to minimum
                     if await decrease_button.is_enabled():
+                        old_value = await self.get_stepper_value("adults")
                         await decrease_button.click()
-                        await self.page.wait_for_timeout(500)
+                        await self.wait_for_stepper_change("adults decreased", "adults", old_value)
                     else:
                         break  # Button is disabled, we're at minimum
                 
@@ -179,14 +250,15 @@ class HomePage(BasePage):
                 
                 # Click exactly twice
                 print("Clicking increase adults button exactly twice")
+                old_value = await self.get_stepper_value("adults")
                 await increase_button.click()
-                await self.page.wait_for_timeout(1000)  # Wait between clicks
+                await self.wait_for_stepper_change("adults increased", "adults", old_value)
                 
                 # await increase_button.click()
                 # await self.page.wait_for_timeout(1000)
                 
                 # Take a screenshot to verify
-                await self.page.screenshot(path="adults_set_to_2.png")
+                await self.screenshot("adults_set_to_2")
             except Exception as e:
                 print(f"Error setting adults to 2: {e}")
                 
@@ -216,7 +288,12 @@ class HomePage(BasePage):
                             }, 1000);
                         }
                     ''')
-                    await self.page.wait_for_timeout(3000)  # Wait for JS to complete
+                    # Wait for JS to complete
+                    await self.wait_for_condition(
+                        "adults set by JavaScript",
+                        '(selector) => ((document.querySelector(selector) || {}).textContent || "").trim() === "2"',
+                        arg='[data-testid="stepper-adults-value"]'
+                    )
                     print("Used JavaScript to set adults to 2")
                 except Exception as e2:
                     print(f"JavaScript approach also failed: {e2}")
@@ -235,19 +312,20 @@ class HomePage(BasePage):
                 except Exception as e2:
                     print(f"Enter key also failed: {e2}")
             
-            await self.page.wait_for_timeout(2000)
+            await self.wait_for_dom("guest menu closed", '[data-testid="stepper-adults-increase-button"]', state="hidden")
             
         except Exception as e:
             print(f"Overall error in guest selection: {e}")
-            await self.page.screenshot(path="guest_selection_error.png")
+            await self.error_screenshot("guest_selection_error")
 
         # Now click the Search button to submit the search
         print("Submitting search...")
+        url_before_search = self.page.url
         try:
             # Click the main search button
             search_button = self.page.locator('button[data-testid="structured-search-input-search-button"]')
             if await search_button.count() > 0:
-                await search_button.click()
+                await self.run_and_wait_for_response("search results response", search_button.click)
                 print("Clicked main search button")
             else:
                 # Try alternative search button selectors
@@ -262,12 +340,12 @@ class HomePage(BasePage):
                     await self.page.keyboard.press("Enter")
         except Exception as e:
             print(f"Error clicking search button: {e}")
-            await self.page.screenshot(path="search_button_error.png")
+            await self.error_screenshot("search_button_error")
 
         # Wait for the search results to load
         print("Waiting for search results...")
-        await self.page.wait_for_timeout(5000)
-        await self.page.screenshot(path="search_results.png")
+        await self.wait_for_url_change("search results URL", url_before_search)
+        await self.screenshot("search_results")
 
         # Now click the Search button to submit the search
         # print("Submitting search...")
@@ -310,7 +388,7 @@ class HomePage(BasePage):
             except Exception as e2:
                 print(f"Alternative search button error: {e2}")
                 # Take a screenshot of the final state
-                await self.page.screenshot(path="final_state.png")
+                await self.error_screenshot("final_state")
 
         # Handle children count if needed
         if children > 0:
@@ -322,8 +400,9 @@ class HomePage(BasePage):
                     decrease_button = self.page.locator('[data-testid="stepper-children-decrease-button"]').first
                     for _ in range(5):  # Try up to 5 times to reset
                         if await decrease_button.is_enabled():
+                            old_value = await self.get_stepper_value("children")
                             await decrease_button.click()
-                            await self.page.wait_for_timeout(500)
+                            await self.wait_for_stepper_change("children decreased", "children", old_value)
                         else:
                             break  # At minimum
                 except Exception as e:
@@ -332,11 +411,12 @@ class HomePage(BasePage):
                 # Now increase to the desired number
                 increase_button = self.page.locator('[data-testid="stepper-children-increase-button"]').first
                 for _ in range(children):
+                    old_value = await self.get_stepper_value("children")
                     await increase_button.click()
-                    await self.page.wait_for_timeout(500)
+                    await self.wait_for_stepper_change("children increased", "children", old_value)
                 
                 print(f"Children count set to {children}")
-                await self.page.screenshot(path=f"children_set_to_{children}.png")
+                await self.screenshot(f"children_set_to_{children}")
                 
                 # If adding children, sometimes there's an age selector that appears
                 try:
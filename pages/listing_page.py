@@ -1,6 +1,8 @@
+from instrumentation import timed_step
 from pages.base_page import BasePage
 
 class ListingPage(BasePage):
+    @timed_step()
     async def get_reservation_summary(self):
         await self.wait_for_selector('[data-testid="BookIt-default"]')
         title = await self.page.locator("h1").text_content()
@@ -10,15 +12,18 @@ class ListingPage(BasePage):
             "total_price": total_price.strip() if total_price else "N/A"
         }
 
+    @timed_step()
     async def click_reserve(self):
         await self.page.locator("button", has_text="Reserve").click()
 
+    @timed_step()
     async def enter_phone_number(self, phone_number: str):
         try:
             await self.page.locator('input[type="tel"]').fill(phone_number)
         except:
             pass  # if no phone field is available, ignore
 
+    @timed_step()
     async def verify_family_suitability(self):
         """Verify that the listing is suitable for a family with children."""
         # Check if amenities section is available
@@ -58,6 +63,7 @@ class ListingPage(BasePage):
             "family_amenities": []
         }
 
+    @timed_step()
     async def check_accommodation_limits(self):
         """Check the maximum number of guests and if children are welcome."""
         try:
@@ -1,18 +1,561 @@
+import asyncio
+import time
+from collections import deque
+from datetime import date
+from urllib.parse import parse_qs, unquote, urlparse
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from instrumentation import timed_step
 from pages.base_page import BasePage
+from listing_analysis import analyze_listing_stream, analyze_listings
+from price_parser import parse_price
+from search_api import build_page_url, find_pagination_info, parse_embedded_state, parse_search_payload
+from selector_cache import SelectorCache
+
+# Extracts every listing card (or a batch of them) in a single round trip.
+# Receives the candidate selector lists (or explicit card elements) and returns
+# plain dicts, so no ElementHandles have to be walked from Python.
+EXTRACT_CARDS_JS = '''
+    ({cards, cardSelectors, nameSelectors, priceSelectors, ratingSelectors, start, limit}) => {
+        if (!cards || cards.length === 0) {
+            cards = [];
+            for (const selector of cardSelectors) {
+                let found = [];
+                try {
+                    found = Array.from(document.querySelectorAll(selector));
+                } catch (e) {
+                    continue;
+                }
+                if (found.length > 0) {
+                    cards = found;
+                    break;
+                }
+            }
+        }
+
+        // Only extract the requested batch of cards
+        if (limit !== null) {
+            cards = cards.slice(start, start + limit);
+        }
+
+        function firstMatch(card, selectors) {
+            for (const selector of selectors) {
+                try {
+                    const el = card.querySelector(selector);
+                    if (el) return el;
+                } catch (e) {}
+            }
+            return null;
+        }
+
+        return cards.map(card => {
+            const nameEl = firstMatch(card, nameSelectors);
+            let name = null;
+            if (nameEl) {
+                name = nameEl.tagName === 'META' ? nameEl.getAttribute('content') : nameEl.textContent;
+            }
+
+            const priceEl = firstMatch(card, priceSelectors);
+            const price = priceEl ? priceEl.textContent : null;
+
+            let rating = null;
+            let reviewCount = null;
+            for (const selector of ratingSelectors) {
+                let el = null;
+                try { el = card.querySelector(selector); } catch (e) { continue; }
+                const label = el && el.getAttribute('aria-label');
+                if (!label) continue;
+                const value = parseFloat(label.split(' ')[0]);
+                if (isNaN(value)) continue;
+                rating = value;
+                const reviews = label.match(/(\\d[\\d,]*)\\s+reviews?/i);
+                if (reviews) reviewCount = parseInt(reviews[1].replace(/,/g, ''), 10);
+                break;
+            }
+            if (reviewCount === null) {
+                const reviews = (card.textContent || '').match(/\\((\\d[\\d,]*)\\)/);
+                if (reviews && rating !== null) reviewCount = parseInt(reviews[1].replace(/,/g, ''), 10);
+            }
+
+            let url = null;
+            let listingId = null;
+            const link = card.querySelector('a[href*="/rooms/"]');
+            const metaUrl = card.querySelector('meta[itemprop="url"]');
+            if (link) {
+                url = link.href;
+            } else if (metaUrl) {
+                url = metaUrl.getAttribute('content');
+            }
+            if (url) {
+                const idMatch = url.match(/\\/rooms\\/(?:plus\\/)?(\\d+)/);
+                if (idMatch) listingId = idMatch[1];
+                if (url.startsWith('/') || !/^https?:/.test(url)) {
+                    url = new URL(url, window.location.origin).href;
+                }
+            }
+
+            return {name, price, rating, review_count: reviewCount, listing_id: listingId, url};
+        });
+    }
+'''
+
+# Resolves listing cards from anchors (price or image elements) or from large
+# sized containers entirely in the page. All geometry is read in one pass before
+# anything is written, so layout is computed once instead of once per element.
+# The resolved cards are marked with data-resolved-card (cleared on every call) and
+# get a data-card-id that stays the same across calls.
+RESOLVE_CARDS_JS = '''
+    ({strategy, selectors, minWidth, minHeight, maxDepth}) => {
+        const tried = [];
+        let cards = [];
+        let winner = null;
+
+        if (strategy === 'ancestor') {
+            // The closest ancestor (up to maxDepth levels) of each anchor that is card-sized
+            for (const selector of selectors) {
+                const started = performance.now();
+                let anchors = [];
+                try {
+                    anchors = Array.from(document.querySelectorAll(selector));
+                } catch (e) {}
+                const found = new Set();
+                for (const anchor of anchors) {
+                    let parent = anchor.parentElement;
+                    for (let depth = 0; parent && depth < maxDepth; depth++) {
+                        const rect = parent.getBoundingClientRect();
+                        if (rect.width > minWidth && rect.height > minHeight) {
+                            found.add(parent);
+                            break;
+                        }
+                        parent = parent.parentElement;
+                    }
+                }
+                tried.push({selector, count: anchors.length, cards: found.size, ms: performance.now() - started});
+                if (found.size > 0) {
+                    cards = Array.from(found);
+                    winner = selector;
+                    break;
+                }
+            }
+        } else {
+            // Large sized containers that have an image, a price or a title
+            const started = performance.now();
+            const selector = selectors[0];
+            const pricePattern = /[$€£¥₪]|night/;
+            for (const div of document.querySelectorAll(selector)) {
+                const rect = div.getBoundingClientRect();
+                if (!(rect.width > minWidth && rect.height > minHeight)) continue;
+                const hasImage = div.querySelector('img') !== null;
+                const hasTitle = div.querySelector('div[role="heading"], span[role="heading"], h3, h4') !== null;
+                const hasPrice = !hasImage && !hasTitle
+                    && Array.from(div.querySelectorAll('span')).some(span => pricePattern.test(span.textContent));
+                if (hasImage || hasTitle || hasPrice) cards.push(div);
+            }
+            tried.push({selector, count: cards.length, cards: cards.length, ms: performance.now() - started});
+            winner = cards.length > 0 ? selector : null;
+        }
+
+        // Writes only after every read
+        for (const el of document.querySelectorAll('[data-resolved-card]')) {
+            el.removeAttribute('data-resolved-card');
+        }
+        window.__nextCardId = window.__nextCardId || 0;
+        const ids = cards.map(card => {
+            if (!card.hasAttribute('data-card-id')) {
+                card.setAttribute('data-card-id', String(window.__nextCardId++));
+            }
+            card.setAttribute('data-resolved-card', 'true');
+            return card.getAttribute('data-card-id');
+        });
+        return {selector: winner, ids, tried};
+    }
+'''
+
+
+def _results_path(url):
+    """The origin and path of a URL, without the query (search parameters, cursor)."""
+    url = urlparse(url or "")
+    return url.scheme, url.netloc, url.path
+
 
 class SearchResultsPage(BasePage):
 
+    # A search response arriving this shortly before the URL changes to the same results
+    # path belongs to the new URL: searches, filters and paging update the URL with
+    # pushState only once their results are in
+    SEARCH_URL_UPDATE_GRACE_S = 2.0
+
+    # Ordered candidate selectors, shared by the ElementHandle helpers and the
+    # single-evaluate bulk extraction below
+    CARD_SELECTORS = [
+        # Common selectors for listing cards
+        'div[itemprop="itemListElement"]',
+        'div[data-testid="card-container"]',
+        'div[data-testid="listing-card"]',
+        'div[role="group"][aria-labelledby]',
+        'div[data-plugin-in-point-id="EXPLORE_STRUCTURED_PAGE_TITLE"]',
+        # Class-based selectors that are commonly used in Airbnb
+        '.c4mnd7m', 
+        'div.c1e3nyle',
+        'div.cy5jw6o',
+        'div.g1qv1ctd',
+        'div.g1tup9az',
+        # More generic selectors
+        'div[id^="FMP-target"]',
+        'div[id^="listing-"]',
+        'div[id^="card-"]'
+    ]
+
+    NAME_SELECTORS = [
+        'div[data-testid="listing-card-title"]', 
+        'meta[itemprop="name"]',
+        'span[data-testid="listing-card-name"]',
+        'div[data-plugin-in-point-id="EXPLORE_STRUCTURED_PAGE_TITLE"]'
+    ]
+
+    PRICE_SELECTORS = [
+        '[data-testid="price-label"]',
+        'span[data-testid="price-and-total"]',
+        'span._tyxjp1'  # Class-based selector as fallback
+    ]
+
+    RATING_SELECTORS = [
+        '[aria-label*="out of 5"]',
+        'span[aria-label*="stars"]',
+        'span._10fy1f8'  # Class-based selector as fallback
+    ]
+
+    def __init__(self, page, wait_timeouts=None, selector_cache=None, results_store=None, instrumentation=None,
+                 screenshots=None):
+        super().__init__(page, wait_timeouts, instrumentation, screenshots)
+        # Optional ResultsStore every analyzed listing is appended to
+        self.results_store = results_store
+        # Which selectors worked before, so they are tried first (shared and persisted by default)
+        self.selector_cache = selector_cache or SelectorCache.shared()
+        # Cached result of extract_listing_cards for the current URL
+        self._snapshot = None
+        self._snapshot_url = None
+        # Listings parsed from the most recent search API response, the page URL they
+        # belong to and when they arrived
+        self._api_listings = []
+        self._api_url = None
+        self._api_captured_at = None
+        # Cursors of the other results pages, from the same payload as the listings
+        # (or the embedded page state), and the page URL they belong to
+        self._pagination = {"next_page_cursor": None, "page_cursors": None}
+        self._pagination_url = None
+        self.page.on("framenavigated", self._on_frame_navigated)
+        self.page.on("response", self._on_response)
+
+    def _on_frame_navigated(self, frame):
+        """
+        Drop the listing snapshot when the main frame navigates. Captured API listings
+        are kept: they are only used while the page is on the URL they belong to.
+        """
+        if frame != self.page.main_frame:
+            return
+        self.invalidate_snapshot()
+        if (self._api_listings and self._api_url != frame.url
+                and time.monotonic() - self._api_captured_at <= self.SEARCH_URL_UPDATE_GRACE_S
+                and _results_path(self._api_url) == _results_path(frame.url)):
+            # The URL update of the search whose response just arrived
+            if self._pagination_url == self._api_url:
+                self._pagination_url = frame.url
+            self._api_url = frame.url
+
+    def _captured_listings(self):
+        """The listings captured from the search API for the current URL, if any."""
+        return self._api_listings if self._api_url == self.page.url else []
+
+    def _current_pagination(self):
+        """The pagination info of the current URL (both cursors None if unknown)."""
+        if self._pagination_url == self.page.url:
+            return self._pagination
+        return {"next_page_cursor": None, "page_cursors": None}
+
+    async def _on_response(self, response):
+        """Capture listings from search API responses as they arrive."""
+        if not self.is_search_response(response) or response.status != 200:
+            return
+        try:
+            payload = await response.json()
+        except Exception as e:
+            print(f"Could not read search response {response.url}: {e}")
+            return
+        listings = parse_search_payload(payload, self._origin())
+        if listings:
+            # The latest search response replaces the previous one
+            self._api_listings = self._finalize_cards(listings)
+            self._api_url = self._pagination_url = self.page.url
+            self._api_captured_at = time.monotonic()
+            self._pagination = find_pagination_info(payload)
+            self._snapshot = None
+            print(f"Captured {len(listings)} listings from search API response")
+
+    def _origin(self):
+        url = urlparse(self.page.url)
+        if url.scheme in ("http", "https") and url.netloc:
+            return f"{url.scheme}://{url.netloc}"
+        return "https://www.airbnb.com"
+
+    def _ordered(self, group, selectors):
+        """Return selectors with the ones that worked before on this domain first."""
+        return self.selector_cache.order(urlparse(self.page.url).netloc, group, selectors)
+
+    def _record_selector(self, group, selector, hit, started):
+        """Record whether selector found something and how long the attempt took."""
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.selector_cache.record(urlparse(self.page.url).netloc, group, selector, hit, latency_ms)
+
+    def _record_probes(self, group, probes, winner):
+        """
+        Record a probe_selectors result: a hit for the selector that was used and a miss for
+        the ones that matched nothing. Selectors that matched but weren't used aren't
+        recorded, so a generic selector matching everywhere doesn't gain on the one chosen.
+        """
+        domain = urlparse(self.page.url).netloc
+        for probe in probes:
+            if probe["selector"] == winner:
+                self.selector_cache.record(domain, group, winner, True, probe["ms"])
+            elif probe["count"] == 0:
+                self.selector_cache.record(domain, group, probe["selector"], False, probe["ms"])
+
+    @timed_step()
+    async def find_cards_by_probe(self, group, selectors):
+        """
+        Probe all selectors in one round trip and return (selector, elements) for the
+        best one: the first (in cache order) with visible matches, else the first with
+        any matches. Only the winner's elements are fetched. Returns (None, []) if none match.
+        """
+        probes = await self.probe_selectors(self._ordered(group, selectors))
+        matching = [probe for probe in probes if probe["count"] > 0]
+        winner = next((probe for probe in matching if probe["visible"] > 0), matching[0]) if matching else None
+        self._record_probes(group, probes, winner and winner["selector"])
+        if winner is None:
+            return None, []
+        print(f"Probed {len(probes)} selectors in one round trip; using {winner['selector']} "
+              f"({winner['count']} matches, ~{winner['width']:.0f}x{winner['height']:.0f}px)")
+        return winner["selector"], await self.page.query_selector_all(winner["selector"])
+
+    @timed_step()
+    async def resolve_cards(self, group, selectors, strategy="ancestor", min_width=200, min_height=200, max_depth=5):
+        """
+        Resolve listing cards in the page in one round trip and return (selector, elements).
+
+        With strategy "ancestor", selectors are anchors (e.g. prices or images) and each
+        card is the closest card-sized ancestor of an anchor, using the first selector
+        (in cache order) that yields any. With "large", selectors[0] matches candidate
+        containers, kept if card-sized and holding an image, a price or a title.
+        Duplicate containers are returned once. Returns (None, []) if nothing is found.
+        """
+        if strategy == "ancestor":
+            selectors = self._ordered(group, selectors)
+        args = {"strategy": strategy, "selectors": list(selectors),
+                "minWidth": min_width, "minHeight": min_height, "maxDepth": max_depth}
+        result = await self.page.evaluate(RESOLVE_CARDS_JS, args)
+        domain = urlparse(self.page.url).netloc
+        for attempt in result["tried"]:
+            self.selector_cache.record(domain, group, attempt["selector"], attempt["cards"] > 0, attempt["ms"])
+        if not result["ids"]:
+            return None, []
+        print(f"Resolved {len(result['ids'])} cards in-page from {result['selector']}")
+        return result["selector"], await self.page.query_selector_all('[data-resolved-card]')
+
+    def invalidate_snapshot(self):
+        """Forget the cached listing snapshot."""
+        self._snapshot = None
+        self._snapshot_url = None
+
+    async def get_listing_snapshot(self, refresh=False):
+        """Return the listing cards of the current page, extracting them only once per URL."""
+        if refresh:
+            self.invalidate_snapshot()
+        return [card async for card in self.iter_listings()]
+
+    async def iter_listings(self, all_pages=False, batch_size=10):
+        """
+        Yield lightweight listing dicts as soon as they are parsed.
+
+        Prefers structured data from the search API, then the server-rendered page
+        state, and only scrapes the DOM if neither is available, batch_size cards per
+        evaluate call so the first listings arrive before the whole page is parsed.
+        No ElementHandles are kept. A fully consumed page is cached as the snapshot.
+        With all_pages=True every results page is crawled (see crawl_listings).
+        """
+        if all_pages:
+            async for card in self.crawl_listings():
+                yield card
+            return
+
+        if self._snapshot is not None and self._snapshot_url == self.page.url:
+            for card in self._snapshot:
+                yield card
+            return
+
+        url = self.page.url
+        cards = self._captured_listings()
+        if cards:
+            print(f"Using {len(cards)} listings captured from the search API")
+        else:
+            cards = await self.extract_embedded_listings()
+
+        if cards:
+            for card in cards:
+                yield card
+        else:
+            cards = []
+            while True:
+                batch = await self.extract_listing_cards(start=len(cards), limit=batch_size)
+                cards.extend(batch)
+                for card in batch:
+                    yield card
+                if len(batch) < batch_size:
+                    break
+
+        self._snapshot = cards
+        self._snapshot_url = url
+
+    @timed_step()
+    async def extract_embedded_listings(self):
+        """Parse the listings from the JSON state the results page is server-rendered with."""
+        try:
+            script_texts = await self.page.evaluate('''
+                () => Array.from(document.querySelectorAll('script[id^="data-deferred-state"], script#data-injector-instances'))
+                    .map(script => script.textContent)
+            ''')
+        except Exception as e:
+            print(f"Error reading embedded page state: {e}")
+            return []
+        listings, pagination = parse_embedded_state(script_texts, self._origin())
+        if listings:
+            print(f"Parsed {len(listings)} listings from embedded page state")
+            self._pagination = pagination
+            self._pagination_url = self.page.url
+        return self._finalize_cards(listings)
+
+    @timed_step()
+    async def _fetch_results_page(self, search_url, cursor, semaphore):
+        """Load one results page in its own tab and return its listings and pagination info."""
+        async with semaphore:
+            tab = await self.page.context.new_page()
+            try:
+                results = SearchResultsPage(tab, self.wait_timeouts, self.selector_cache,
+                                            instrumentation=self.instrumentation)
+                await tab.goto(build_page_url(search_url, cursor), wait_until="domcontentloaded")
+                await results.wait_for_results()
+                cards = await results.get_listing_snapshot()
+                self.wait_report.extend(results.wait_report)
+                return cards, results._current_pagination()
+            finally:
+                await tab.close()
+
+    async def crawl_listings(self, max_pages=15, concurrency=3):
+        """
+        Yield the listings of every results page, one at a time, without duplicates.
+
+        Starts with the current page and then loads the pages after it in separate tabs,
+        up to `concurrency` at a time. If the payload lists every page cursor, pages
+        are fetched ahead in a window of `concurrency`; otherwise the next-page cursor
+        is followed and page N+1 is prefetched while page N is consumed. Only the
+        pages in flight are held in memory. A page that fails to load is logged and
+        skipped, keeping the listings of the other pages.
+        """
+        seen = set()
+
+        def unseen(cards):
+            for card in cards:
+                key = card.get("listing_id") or (card.get("name"), card.get("price"))
+                if key not in seen:
+                    seen.add(key)
+                    yield card
+
+        async for card in self.iter_listings():
+            for fresh_card in unseen([card]):
+                yield fresh_card
+
+        search_url = self.page.url
+        pagination = self._current_pagination()
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        # (cursor, task) of the pages being fetched, in page order
+        in_flight = deque()
+
+        def fetch(cursor):
+            in_flight.append((cursor, asyncio.ensure_future(self._fetch_results_page(search_url, cursor, semaphore))))
+
+        async def next_page():
+            """Wait for the oldest page in flight; a page that fails is logged and skipped."""
+            cursor, task = in_flight.popleft()
+            try:
+                return await task
+            except Exception as e:
+                print(f"Error fetching results page {cursor}: {e}")
+                return [], None
+
+        try:
+            if pagination["page_cursors"]:
+                # Crawl the pages after the one we're on (the first page has no cursor in its URL)
+                page_cursors = pagination["page_cursors"]
+                cursor = parse_qs(urlparse(search_url).query).get("cursor", [None])[0]
+                current = page_cursors.index(cursor) if cursor in page_cursors else 0
+                cursors = iter(page_cursors[current + 1:current + max_pages])
+                for cursor in cursors:
+                    fetch(cursor)
+                    if len(in_flight) >= concurrency:
+                        break
+                while in_flight:
+                    cards, _ = await next_page()
+                    next_cursor = next(cursors, None)
+                    if next_cursor:
+                        fetch(next_cursor)
+                    for card in unseen(cards):
+                        yield card
+            else:
+                cursor = pagination["next_page_cursor"]
+                pages = 1
+                if cursor and pages < max_pages:
+                    fetch(cursor)
+                while in_flight:
+                    cards, page_pagination = await next_page()
+                    pages += 1
+                    if page_pagination is None:
+                        # Without the failed page's cursor there is no way to the pages after it
+                        print(f"Stopping the crawl after {pages - 1} pages")
+                        break
+                    cursor = page_pagination["next_page_cursor"]
+                    # Prefetch the next page before handing out this one
+                    if cursor and pages < max_pages:
+                        fetch(cursor)
+                    for card in unseen(cards):
+                        yield card
+        finally:
+            for _, task in in_flight:
+                task.cancel()
+
+    @timed_step()
+    async def wait_for_results(self):
+        """Wait until listing cards are rendered, falling back to network idle if none show up."""
+        if not await self.wait_for_dom("listing cards rendered", ", ".join(self.CARD_SELECTORS),
+                                       state="attached", timeout=self.wait_timeouts["response"]):
+            started = time.perf_counter()
+            try:
+                await self.page.wait_for_load_state("networkidle", timeout=self.wait_timeouts["response"])
+                outcome = "ok"
+            except PlaywrightTimeoutError:
+                outcome = "timeout"
+            self._record_wait("network idle", "load", started, outcome)
+
+    @timed_step()
     async def get_all_listings(self):
         """Get all listings from the search results page with more robust detection."""
         try:
             print("Waiting for search results to appear...")
             
             # Take a screenshot of the current page state
-            await self.page.screenshot(path="before_finding_listings.png")
+            await self.screenshot("before_finding_listings")
             
-            # First wait for page to be fully loaded
-            await self.page.wait_for_load_state("networkidle", timeout=15000)
-            await self.page.wait_for_timeout(5000)  # Additional wait to ensure JS has executed
+            # First wait for the listing cards to be rendered
+            await self.wait_for_results()
             
             # Get the URL to confirm we're on a search results page
             current_url = self.page.url
@@ -21,172 +564,157 @@ class SearchResultsPage(BasePage):
                 print("Warning: URL doesn't appear to be a search results page")
             
             # Take another screenshot after waiting
-            await self.page.screenshot(path="search_page_loaded.png")
-            
-            # ======= APPROACH 1: Try specific Airbnb selectors =======
-            airbnb_selectors = [
-                # Common selectors for listing cards
-                'div[itemprop="itemListElement"]',
-                'div[data-testid="card-container"]',
-                'div[data-testid="listing-card"]',
-                'div[role="group"][aria-labelledby]',
-                'div[data-plugin-in-point-id="EXPLORE_STRUCTURED_PAGE_TITLE"]',
-                # Class-based selectors that are commonly used in Airbnb
-                '.c4mnd7m', 
-                'div.c1e3nyle',
-                'div.cy5jw6o',
-                'div.g1qv1ctd',
-                'div.g1tup9az',
-                # More generic selectors
-                'div[id^="FMP-target"]',
-                'div[id^="listing-"]',
-                'div[id^="card-"]'
-            ]
-            
-            # Try each Airbnb-specific selector
-            listings = []
-            for selector in airbnb_selectors:
-                try:
-                    print(f"Trying selector: {selector}")
-                    # Check if elements with this selector exist
-                    count = await self.page.locator(selector).count()
-                    if count > 0:
-                        print(f"Found {count} elements with selector: {selector}")
-                        # Get all elements with this selector
-                        elements = await self.page.query_selector_all(selector)
-                        listings = elements
-                        print(f"Successfully found {len(listings)} listings with selector: {selector}")
-                        break
-                except Exception as e:
-                    print(f"Error with selector {selector}: {e}")
-                    continue
-            
-            # ======= APPROACH 2: Use price elements as anchors =======
-            if not listings:
-                print("Trying to find listings by price elements...")
-                try:
-                    # Look for price elements which are commonly found in listing cards
-                    price_selectors = [
-                        '[data-testid="price-label"]', 
-                        'span[data-testid="price-and-total"]',
-                        'span._tyxjp1',
-                        'span[data-testid="listing-card-price"]',
-                        'span.a8jt5op',
-                        'span.pricingContainer',
-                        'span._1y74zjx',
-                        'span.l1dfad8f'
-                    ]
-                    
-                    # Try each price selector
-                    for price_selector in price_selectors:
-                        price_elements = await self.page.query_selector_all(price_selector)
-                        if price_elements and len(price_elements) > 0:
-                            print(f"Found {len(price_elements)} price elements with selector: {price_selector}")
-                            
-                            # For each price element, navigate up to find the parent card
-                            found_cards = []
-                            for price_elem in price_elements:
-                                # Navigate up 3-5 levels to find the card container
-                                parent = price_elem
-                                for _ in range(5):
-                                    if not parent:
-                                        break
-                                    # Get the parent element
-                                    parent = await parent.query_selector('xpath=..')
-                                    # Check if this might be a listing card
-                                    if parent:
-                                        bounding_box = await parent.bounding_box()
-                                        # Check if element is large enough to be a card
-                                        if bounding_box and bounding_box['width'] > 200 and bounding_box['height'] > 200:
-                                            found_cards.append(parent)
-                                            break
-                            
-                            if found_cards:
-                                print(f"Found {len(found_cards)} potential listing cards from price elements")
-                                listings = found_cards
-                                break
-                except Exception as e:
-                    print(f"Error finding listings by price elements: {e}")
-            
-            # ======= APPROACH 3: Look for image containers =======
-            if not listings:
-                print("Trying to find listings by image containers...")
-                try:
-                    # Look for image containers which are typically part of listing cards
-                    image_selectors = [
-                        'div[data-testid="listing-card-image-container"]',
-                        'div[data-testid="card-image-container"]',
-                        'div.mwt43bw',
-                        'div.image-container',
-                        'div[data-veloute="slideshow"]',
-                        'img[data-testid="listing-card-image"]',
-                        'img.itu7ddv'
-                    ]
-                    
-                    for img_selector in image_selectors:
-                        img_elements = await self.page.query_selector_all(img_selector)
-                        if img_elements and len(img_elements) > 0:
-                            print(f"Found {len(img_elements)} image elements with selector: {img_selector}")
-                            
-                            # For each image element, navigate up to find the parent card
-                            found_cards = []
-                            for img_elem in img_elements:
-                                # Navigate up 3-5 levels to find the card container
-                                parent = img_elem
-                                for _ in range(5):
-                                    if not parent:
-                                        break
-                                    # Get the parent element
-                                    parent = await parent.query_selector('xpath=..')
-                                    # Check if this might be a listing card
-                                    if parent:
-                                        bounding_box = await parent.bounding_box()
-                                        # Check if element is large enough to be a card
-                                        if bounding_box and bounding_box['width'] > 200 and bounding_box['height'] > 200:
-                                            found_cards.append(parent)
-                                            break
-                            
-                            if found_cards:
-                                print(f"Found {len(found_cards)} potential listing cards from image elements")
-                                listings = found_cards
-                                break
-                except Exception as e:
-                    print(f"Error finding listings by image elements: {e}")
-            
-            # ======= APPROACH 4: Last resort - look for large container divs =======
-            if not listings:
-                print("Last resort: Looking for large container divs...")
-                try:
-                    # Get all divs that look like they could be cards based on size
-                    large_divs = await self.page.query_selector_all('div[style*="width"][style*="height"]')
-                    large_containers = []
-                    
-                    for div in large_divs:
-                        bounding_box = await div.bounding_box()
-                        if bounding_box and bounding_box['width'] > 250 and bounding_box['height'] > 200:
-                            # Check if it has any of: an image, a price, or text that looks like a title
-                            has_image = await div.query_selector('img') is not None
-                            has_price = await div.query_selector('span:text-matches(/[$€£¥]|night/)') is not None
-                            has_title = await div.query_selector('div[role="heading"], span[role="heading"], h3, h4') is not None
-                            
-                            if has_image or has_price or has_title:
-                                large_containers.append(div)
-                    
-                    if large_containers:
-                        print(f"Found {len(large_containers)} potential listing cards based on size and content")
-                        listings = large_containers
-                except Exception as e:
-                    print(f"Error finding listings by large containers: {e}")
-            
-            # ======= APPROACH 5: Use JavaScript to find listings =======
-            if not listings:
-                print("Using JavaScript to find listings...")
-                try:
-                    listings_from_js = await self.page.evaluate('''
+            await self.screenshot("search_page_loaded")
+            
+            listings = await self.find_listing_cards()
+            
+            # Final check and return
+            if listings and len(listings) > 0:
+                print(f"Final count of listings found: {len(listings)}")
+                # Snapshot the cards now so the analysis doesn't have to detect them again,
+                # in the same order as iter_listings: search API data (if captured, it is
+                # used as is), then the embedded page state, and only then the DOM
+                if not self._captured_listings():
+                    self._snapshot = (await self.extract_embedded_listings()
+                                      or await self.extract_listing_cards(listings))
+                    self._snapshot_url = self.page.url
+                return listings
+            else:
+                print("No listings found after trying all detection methods")
+                return []
+        
+        except Exception as e:
+            print(f"Error in get_all_listings: {e}")
+            # Take a screenshot of the error state
+            await self.error_screenshot("error_finding_listings")
+            return []
+        finally:
+            self.selector_cache.save()
+
+    @timed_step()
+    async def find_listing_cards(self):
+        """
+        Detect the listing card elements of the loaded results page, trying the
+        Airbnb-specific selectors first and falling back to in-page heuristics.
+        Returns an empty list if nothing looks like a listing.
+        """
+        # ======= APPROACH 1: Try specific Airbnb selectors =======
+        # Probe every Airbnb-specific selector at once, then fetch only the winner's elements
+        listings = []
+        try:
+            selector, listings = await self.find_cards_by_probe("card", self.CARD_SELECTORS)
+            if listings:
+                print(f"Successfully found {len(listings)} listings with selector: {selector}")
+        except Exception as e:
+            print(f"Error probing card selectors: {e}")
+        
+        # ======= APPROACH 2: Use price elements as anchors =======
+        if not listings:
+            print("Trying to find listings by price elements...")
+            try:
+                # Look for price elements which are commonly found in listing cards;
+                # each card is the closest card-sized ancestor, resolved in the page
+                price_selectors = [
+                    '[data-testid="price-label"]', 
+                    'span[data-testid="price-and-total"]',
+                    'span._tyxjp1',
+                    'span[data-testid="listing-card-price"]',
+                    'span.a8jt5op',
+                    'span.pricingContainer',
+                    'span._1y74zjx',
+                    'span.l1dfad8f'
+                ]
+                _, found_cards = await self.resolve_cards("price_anchor", price_selectors)
+                if found_cards:
+                    print(f"Found {len(found_cards)} potential listing cards from price elements")
+                    listings = found_cards
+            except Exception as e:
+                print(f"Error finding listings by price elements: {e}")
+        
+        # ======= APPROACH 3: Look for image containers =======
+        if not listings:
+            print("Trying to find listings by image containers...")
+            try:
+                # Look for image containers which are typically part of listing cards
+                image_selectors = [
+                    'div[data-testid="listing-card-image-container"]',
+                    'div[data-testid="card-image-container"]',
+                    'div.mwt43bw',
+                    'div.image-container',
+                    'div[data-veloute="slideshow"]',
+                    'img[data-testid="listing-card-image"]',
+                    'img.itu7ddv'
+                ]
+                _, found_cards = await self.resolve_cards("image_anchor", image_selectors)
+                if found_cards:
+                    print(f"Found {len(found_cards)} potential listing cards from image elements")
+                    listings = found_cards
+            except Exception as e:
+                print(f"Error finding listings by image elements: {e}")
+        
+        # ======= APPROACH 4: Last resort - look for large container divs =======
+        if not listings:
+            print("Last resort: Looking for large container divs...")
+            try:
+                # Divs sized like cards that have an image, a price or a title
+                _, large_containers = await self.resolve_cards(
+                    "large_container", ['div[style*="width"][style*="height"]'],
+                    strategy="large", min_width=250, min_height=200
+                )
+                if large_containers:
+                    print(f"Found {len(large_containers)} potential listing cards based on size and content")
+                    listings = large_containers
+            except Exception as e:
+                print(f"Error finding listings by large containers: {e}")
+        
+        # ======= APPROACH 5: Use JavaScript to find listings =======
+        if not listings:
+            print("Using JavaScript to find listings...")
+            try:
+                listings_from_js = await self.page.evaluate('''
+                    () => {
+                        // Helper function to find elements by text content
+                        function findElementsWithText(text) {
+                            const elements = [];
+                            const walker = document.createTreeWalker(
+                                document.body, 
+                                NodeFilter.SHOW_TEXT, 
+                                { acceptNode: node => node.textContent.includes(text) ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_REJECT }
+                            );
+                            while (walker.nextNode()) {
+                                let element = walker.currentNode.parentElement;
+                                // Go up a few levels to find a container
+                                for (let i = 0; i < 5; i++) {
+                                    if (!element) break;
+                                    const rect = element.getBoundingClientRect();
+                                    if (rect.width > 250 && rect.height > 200) {
+                                        elements.push(element);
+                                        break;
+                                    }
+                                    element = element.parentElement;
+                                }
+                            }
+                            return elements;
+                        }
+                        
+                        // Look for elements with text related to prices or nights
+                        const priceElements = findElementsWithText('night');
+                        
+                        // Get unique parent elements
+                        const uniqueElements = Array.from(new Set(priceElements.map(el => el.outerHTML)));
+                        
+                        // Return a count (we can't return DOM elements directly)
+                        return uniqueElements.length;
+                    }
+                ''')
+                
+                print(f"JavaScript found {listings_from_js} potential listings based on text content")
+                if listings_from_js > 0:
+                    # We found listings via JS, so now we need to actually get them
+                    # Create a data-attribute to mark potential listings
+                    await self.page.evaluate('''
                         () => {
-                            // Helper function to find elements by text content
                             function findElementsWithText(text) {
-                                const elements = [];
                                 const walker = document.createTreeWalker(
                                     document.body, 
                                     NodeFilter.SHOW_TEXT, 
@@ -194,86 +722,35 @@ class SearchResultsPage(BasePage):
                                 );
                                 while (walker.nextNode()) {
                                     let element = walker.currentNode.parentElement;
-                                    // Go up a few levels to find a container
                                     for (let i = 0; i < 5; i++) {
                                         if (!element) break;
                                         const rect = element.getBoundingClientRect();
                                         if (rect.width > 250 && rect.height > 200) {
-                                            elements.push(element);
+                                            element.setAttribute('data-is-potential-listing', 'true');
                                             break;
                                         }
                                         element = element.parentElement;
                                     }
                                 }
-                                return elements;
                             }
                             
-                            // Look for elements with text related to prices or nights
-                            const priceElements = findElementsWithText('night');
-                            
-                            // Get unique parent elements
-                            const uniqueElements = Array.from(new Set(priceElements.map(el => el.outerHTML)));
-                            
-                            // Return a count (we can't return DOM elements directly)
-                            return uniqueElements.length;
+                            // Mark elements with text related to prices
+                            findElementsWithText('night');
+                            findElementsWithText('$');
+                            findElementsWithText('€');
+                            findElementsWithText('£');
                         }
                     ''')
                     
-                    print(f"JavaScript found {listings_from_js} potential listings based on text content")
-                    if listings_from_js > 0:
-                        # We found listings via JS, so now we need to actually get them
-                        # Create a data-attribute to mark potential listings
-                        await self.page.evaluate('''
-                            () => {
-                                function findElementsWithText(text) {
-                                    const walker = document.createTreeWalker(
-                                        document.body, 
-                                        NodeFilter.SHOW_TEXT, 
-                                        { acceptNode: node => node.textContent.includes(text) ? NodeFilter.FILTER_ACCEPT : NodeFilter.FILTER_REJECT }
-                                    );
-                                    while (walker.nextNode()) {
-                                        let element = walker.currentNode.parentElement;
-                                        for (let i = 0; i < 5; i++) {
-                                            if (!element) break;
-                                            const rect = element.getBoundingClientRect();
-                                            if (rect.width > 250 && rect.height > 200) {
-                                                element.setAttribute('data-is-potential-listing', 'true');
-                                                break;
-                                            }
-                                            element = element.parentElement;
-                                        }
-                                    }
-                                }
-                                
-                                // Mark elements with text related to prices
-                                findElementsWithText('night');
-                                findElementsWithText('$');
-                                findElementsWithText('€');
-                                findElementsWithText('£');
-                            }
-                        ''')
-                        
-                        # Now select all elements with our custom attribute
-                        js_listings = await self.page.query_selector_all('[data-is-potential-listing="true"]')
-                        if js_listings and len(js_listings) > 0:
-                            print(f"Found {len(js_listings)} listings via JavaScript")
-                            listings = js_listings
-                except Exception as e:
-                    print(f"Error using JavaScript to find listings: {e}")
-            
-            # Final check and return
-            if listings and len(listings) > 0:
-                print(f"Final count of listings found: {len(listings)}")
-                return listings
-            else:
-                print("No listings found after trying all detection methods")
-                return []
-        
-        except Exception as e:
-            print(f"Error in get_all_listings: {e}")
-            # Take a screenshot of the error state
-            await self.page.screenshot(path="error_finding_listings.png")
-            return []
+                    # Now select all elements with our custom attribute
+                    js_listings = await self.page.query_selector_all('[data-is-potential-listing="true"]')
+                    if js_listings and len(js_listings) > 0:
+                        print(f"Found {len(js_listings)} listings via JavaScript")
+                        listings = js_listings
+            except Exception as e:
+                print(f"Error using JavaScript to find listings: {e}")
+
+        return listings
 
     async def _might_be_listing(self, element):
         """Helper method to determine if an element might be a listing card."""
@@ -295,13 +772,10 @@ class SearchResultsPage(BasePage):
         """Get the name of a listing."""
         try:
             # Try different selectors for the listing title
-            for selector in [
-                'div[data-testid="listing-card-title"]', 
-                'meta[itemprop="name"]',
-                'span[data-testid="listing-card-name"]',
-                'div[data-plugin-in-point-id="EXPLORE_STRUCTURED_PAGE_TITLE"]'
-            ]:
+            for selector in self._ordered("name", self.NAME_SELECTORS):
+                started = time.perf_counter()
                 name_elem = await listing.query_selector(selector)
+                self._record_selector("name", selector, name_elem is not None, started)
                 if name_elem:
                     if selector == 'meta[itemprop="name"]':
                         # For meta tags, get content attribute
@@ -319,12 +793,10 @@ class SearchResultsPage(BasePage):
         """Get the price of a listing."""
         try:
             # Try different price selectors
-            for selector in [
-                '[data-testid="price-label"]',
-                'span[data-testid="price-and-total"]',
-                'span._tyxjp1'  # Class-based selector as fallback
-            ]:
+            for selector in self._ordered("price", self.PRICE_SELECTORS):
+                started = time.perf_counter()
                 price_elem = await listing.query_selector(selector)
+                self._record_selector("price", selector, price_elem is not None, started)
                 if price_elem:
                     price_text = await price_elem.text_content()
                     return price_text
@@ -339,11 +811,8 @@ class SearchResultsPage(BasePage):
         try:
             # Try different rating selectors
             rating = None
-            for selector in [
-                '[aria-label*="out of 5"]',
-                'span[aria-label*="stars"]',
-                'span._10fy1f8'  # Class-based selector as fallback
-            ]:
+            for selector in self._ordered("rating", self.RATING_SELECTORS):
+                started = time.perf_counter()
                 rating_elem = await listing.query_selector(selector)
                 if rating_elem:
                     aria_label = await rating_elem.get_attribute('aria-label')
@@ -354,15 +823,18 @@ class SearchResultsPage(BasePage):
                         if parts and len(parts) > 0:
                             try:
                                 rating = float(parts[0])
+                                self._record_selector("rating", selector, True, started)
                                 break  # Found a valid rating
                             except ValueError:
-                                continue
+                                pass
+                self._record_selector("rating", selector, False, started)
             
             return rating
         except Exception as e:
             print(f"Error getting listing rating: {e}")
             return None
     
+    @timed_step()
     async def get_listing_details(self, listing):
         """Get comprehensive details about a listing."""
         name = await self.get_listing_name(listing)
@@ -375,82 +847,168 @@ class SearchResultsPage(BasePage):
             "rating": rating
         }
     
-    async def extract_price_value(self, price_text):
-        """Extract numeric price value from price text."""
+    def stay_nights(self):
+        """Return the number of nights of the search on the current page (from checkin/checkout), or None."""
+        params = parse_qs(urlparse(self.page.url).query)
+        try:
+            checkin = date.fromisoformat(params["checkin"][0])
+            checkout = date.fromisoformat(params["checkout"][0])
+        except (KeyError, ValueError):
+            return None
+        nights = (checkout - checkin).days
+        return nights if nights > 0 else None
+
+    def search_metadata(self):
+        """Return the location, dates and guests of the search on the current page (from its URL)."""
+        url = urlparse(self.page.url)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.split("/")
+        location = params.get("query")
+        if not location and len(parts) > 2 and parts[1] == "s":
+            location = unquote(parts[2]).replace("--", ", ").replace("-", " ")
+        return {
+            "location": location,
+            "checkin": params.get("checkin"),
+            "checkout": params.get("checkout"),
+            "adults": int(params["adults"]) if params.get("adults", "").isdigit() else None,
+            "children": int(params["children"]) if params.get("children", "").isdigit() else None,
+            "search_url": self.page.url
+        }
+
+    async def _stored(self, listings):
+        """Pass an async stream of listings through, appending them to the results store (if any)."""
+        if self.results_store is None:
+            async for listing in listings:
+                yield listing
+            return
+        from save_results import get_results_writer
+        search = self.search_metadata()
+        batch = []
+        async for listing in listings:
+            batch.append(listing)
+            yield listing
+        # Written by the background writer, off the event loop
+        writer = get_results_writer()
+        await writer.submit(self.results_store.append, batch, search)
+        await writer.submit(self.results_store.flush)
+
+    def extract_price_value(self, price_text, nights=None):
+        """
+        Extract the per-night price from a price text (see price_parser.parse_price).
+
+        Total prices are divided by nights (or the night count in the text); if neither
+        is known the total is returned. Returns infinity for missing prices.
+        """
         if not price_text or price_text == "Price not found":
             return float('inf')  # Return infinity for missing prices
-        
-        # Extract digits and decimal point from the price text
-        digits_only = ''.join(c for c in price_text if c.isdigit() or c == '.')
-        
-        # Find the first occurrence of a number pattern
-        import re
-        match = re.search(r'\d+(?:\.\d+)?', digits_only)
-        if match:
-            try:
-                return float(match.group())
-            except ValueError:
-                return float('inf')
-        
-        return float('inf')
+        parsed = parse_price(price_text, nights)
+        value = parsed.per_night if parsed.per_night is not None else parsed.total
+        return value if value is not None else float('inf')
     
-    async def get_highest_rated_listing(self):
+    @timed_step()
+    async def extract_listing_cards(self, listings=None, start=0, limit=None):
+        """Extract name, price, rating, review count, id and URL of every card in one evaluate call.
+
+        Detects the cards in-page using CARD_SELECTORS. If that finds nothing, falls
+        back to the full detection in get_all_listings and extracts from those elements.
+        With a limit, only the cards start..start+limit are extracted (and there is
+        no fallback for batches after the first).
+        """
+        args = {
+            "cards": listings or [],
+            "cardSelectors": self._ordered("card", self.CARD_SELECTORS),
+            "nameSelectors": self._ordered("name", self.NAME_SELECTORS),
+            "priceSelectors": self._ordered("price", self.PRICE_SELECTORS),
+            "ratingSelectors": self._ordered("rating", self.RATING_SELECTORS),
+            "start": start,
+            "limit": limit
+        }
+        try:
+            cards = await self.page.evaluate(EXTRACT_CARDS_JS, args)
+            if not cards and listings is None and start == 0:
+                print("Bulk extraction found no cards, falling back to full listing detection")
+                listings = await self.get_all_listings()
+                if not listings:
+                    return []
+                args["cards"] = listings
+                args["limit"] = None
+                cards = await self.page.evaluate(EXTRACT_CARDS_JS, args)
+        except Exception as e:
+            print(f"Error extracting listing cards: {e}")
+            return []
+
+        cards = self._finalize_cards(cards)
+        print(f"Extracted {len(cards)} listing cards in a single round trip")
+        return cards
+
+    def _finalize_cards(self, cards):
+        """Normalize name and price text and add the numeric price and currency to raw listing dicts."""
+        nights = self.stay_nights()
+        for card in cards:
+            card["name"] = card["name"].strip() if card["name"] else "Unknown listing"
+            card["price"] = card["price"].strip() if card["price"] else "Price not found"
+            price_value = self.extract_price_value(card["price"], nights)
+            card["price_value"] = price_value if price_value != float('inf') else None
+            card["currency"] = parse_price(card["price"], nights).currency
+        return cards
+
+    async def _reduce_listings(self, cards=None):
+        """Feed the given cards (or the iter_listings stream) through one ListingAggregator."""
+        if cards is not None:
+            return analyze_listings(cards)
+        return await analyze_listing_stream(self.iter_listings())
+
+    async def get_highest_rated_listing(self, cards=None):
         """Find the listing with the highest rating."""
-        listings = await self.get_all_listings()
-        highest_rating = 0
-        highest_rated_listing = None
-        highest_rated_details = None
-        
-        for listing in listings:
-            rating = await self.get_listing_rating(listing)
-            if rating and rating > highest_rating:
-                highest_rating = rating
-                highest_rated_listing = listing
-                highest_rated_details = await self.get_listing_details(listing)
+        highest_rated_listing = (await self._reduce_listings(cards))["highest_rated"]
         
         if highest_rated_listing:
-            print(f"Highest rated listing: {highest_rated_details['name']} - Rating: {highest_rating} - Price: {highest_rated_details['price']}")
+            print(f"Highest rated listing: {highest_rated_listing['name']} - Rating: {highest_rated_listing['rating']} - Price: {highest_rated_listing['price']}")
         else:
             print("No listings with ratings found")
         
         return highest_rated_listing
 
-    async def get_cheapest_listing(self):
+    async def get_cheapest_listing(self, cards=None):
         """Find the listing with the lowest price."""
-        listings = await self.get_all_listings()
-        lowest_price = float('inf')
-        cheapest_listing = None
-        cheapest_details = None
-        
-        for listing in listings:
-            price_text = await self.get_listing_price(listing)
-            price_value = await self.extract_price_value(price_text)
-            
-            if price_value < lowest_price:
-                lowest_price = price_value
-                cheapest_listing = listing
-                cheapest_details = await self.get_listing_details(listing)
+        cheapest_listing = (await self._reduce_listings(cards))["cheapest"]
         
         if cheapest_listing:
-            print(f"Cheapest listing: {cheapest_details['name']} - Price: {cheapest_details['price']}")
-            if cheapest_details['rating']:
-                print(f"Rating: {cheapest_details['rating']}")
+            print(f"Cheapest listing: {cheapest_listing['name']} - Price: {cheapest_listing['price']}")
+            if cheapest_listing['rating']:
+                print(f"Rating: {cheapest_listing['rating']}")
         else:
             print("No listings with prices found")
         
         return cheapest_listing
 
-    async def save_analysis_results(self):
-        """Analyze search results and save the highest rated and cheapest listings to files."""
+    async def get_best_value_listing(self, cards=None):
+        """Find the listing with the best combination of rating and price."""
+        best_value_listing = (await self._reduce_listings(cards))["best_value"]
+        
+        if best_value_listing:
+            print(f"Best value listing: {best_value_listing['name']} - Rating: {best_value_listing['rating']} - Price: {best_value_listing['price']}")
+        else:
+            print("No listings with both rating and price found")
+        
+        return best_value_listing
+
+    @timed_step()
+    async def save_analysis_results(self, all_pages=False):
+        """
+        Analyze search results and save the highest rated and cheapest listings to files.
+
+        With all_pages=True every results page is crawled, not just the current one.
+        """
         try:
-            # Import the save_results function here to avoid circular imports
-            from save_results import save_search_results
+            # Import the save_results functions here to avoid circular imports
+            from save_results import get_results_writer, save_search_results
             
-            # Find the highest-rated listing
-            highest_rated_listing = await self.get_highest_rated_listing()
-            
-            # Find the cheapest listing
-            cheapest_listing = await self.get_cheapest_listing()
+            # Compute every analysis in one pass as the listings stream in (from the cache if already extracted)
+            analysis = await analyze_listing_stream(self._stored(self.iter_listings(all_pages=all_pages)))
+            highest_rated_listing = analysis["highest_rated"]
+            cheapest_listing = analysis["cheapest"]
+            print(f"Analyzed {analysis['count']} listings")
             
             # Check if we found actual listings
             if highest_rated_listing is None and cheapest_listing is None:
@@ -472,26 +1030,24 @@ class SearchResultsPage(BasePage):
                 }
             else:
                 # If we found at least one listing, use the real data
-                highest_rated_details = await self.get_listing_details(highest_rated_listing) if highest_rated_listing else {
+                highest_rated_details = highest_rated_listing if highest_rated_listing else {
                     "name": "Luxury Apartment with Sea View in Tel Aviv",
                     "rating": 4.98,
                     "price": "₪650 per night",
                     "note": "Sample data - highest-rated listing not found"
                 }
                 
-                cheapest_details = await self.get_listing_details(cheapest_listing) if cheapest_listing else {
+                cheapest_details = cheapest_listing if cheapest_listing else {
                     "name": "Cozy Studio in Central Tel Aviv",
                     "rating": 4.75,
                     "price": "₪320 per night",
                     "note": "Sample data - cheapest listing not found"
                 }
             
-            # Save the results to files
-            json_path, txt_path = save_search_results(highest_rated_details, cheapest_details)
+            # Save the results to files in the background (flushed when the event loop's writer is closed)
+            await get_results_writer().submit(save_search_results, highest_rated_details, cheapest_details)
             
-            print("\n--- SEARCH RESULTS SAVED ---")
-            print(f"Results have been saved to {txt_path}")
-            print("----------------------------\n")
+            print("\n--- SEARCH RESULTS QUEUED FOR SAVING ---")
             
             # Return the sample listings if no real ones were found
             if highest_rated_listing is None:
@@ -507,7 +1063,7 @@ class SearchResultsPage(BasePage):
         except Exception as e:
             print(f"Error saving analysis results: {e}")
             # Take a screenshot of the error state
-            await self.page.screenshot(path="error_saving_results.png")
+            await self.error_screenshot("error_saving_results")
             
             # Still provide sample data even if there's an error
             highest_rated_details = {
@@ -526,66 +1082,32 @@ class SearchResultsPage(BasePage):
             
             # Save the sample results anyway
             try:
-                from save_results import save_search_results
-                json_path, txt_path = save_search_results(highest_rated_details, cheapest_details)
-                print(f"Sample results saved despite error: {txt_path}")
+                from save_results import get_results_writer, save_search_results
+                await get_results_writer().submit(save_search_results, highest_rated_details, cheapest_details)
+                print("Sample results queued for saving despite error")
             except Exception as save_error:
                 print(f"Error saving sample results: {save_error}")
             
             return "Sample listing", "Sample listing"
 
-    async def save_family_analysis_results(self):
-        """Analyze search results for family options and save the family-friendly and best value listings to files."""
+    @timed_step()
+    async def save_family_analysis_results(self, all_pages=False):
+        """
+        Analyze search results for family options and save the family-friendly and best value listings to files.
+
+        With all_pages=True every results page is crawled, not just the current one.
+        """
         try:
-            # Import the save_results function here to avoid circular imports
-            from save_results import save_search_results
-            
-            # Get all listings
-            listings = await self.get_all_listings()
-            
-            # Initialize variables for family-friendly and best value listings
-            family_friendly_listing = None
-            best_value_listing = None
-            family_friendly_details = None
-            best_value_details = None
-            
-            # Find the most family-friendly listing (highest rated with amenities suitable for children)
-            highest_rating = 0
-            for listing in listings:
-                rating = await self.get_listing_rating(listing)
-                
-                # Check for family-friendly indicators in the listing name or description
-                name = await self.get_listing_name(listing)
-                is_family_friendly = any(keyword in name.lower() for keyword in 
-                                    ["family", "kid", "child", "children", "spacious", "apartment"])
-                
-                # Consider both rating and family-friendliness
-                if rating and rating > 4.7 and is_family_friendly:
-                    if rating > highest_rating:
-                        highest_rating = rating
-                        family_friendly_listing = listing
-                        family_friendly_details = await self.get_listing_details(listing)
-            
-            # Find the best value listing (good rating with reasonable price)
-            best_value_score = 0
-            for listing in listings:
-                rating = await self.get_listing_rating(listing)
-                price_text = await self.get_listing_price(listing)
-                price_value = await self.extract_price_value(price_text)
-                
-                # Skip listings with no rating or unreasonable prices
-                if not rating or price_value == float('inf'):
-                    continue
-                
-                # Calculate a value score (higher rating and lower price is better)
-                # Normalize price between 0-1 (assuming most Tel Aviv prices are between 300-1000)
-                normalized_price = min(1.0, max(0.0, (1000 - price_value) / 700))
-                value_score = (rating / 5) * 0.7 + normalized_price * 0.3
-                
-                if value_score > best_value_score:
-                    best_value_score = value_score
-                    best_value_listing = listing
-                    best_value_details = await self.get_listing_details(listing)
+            # Import the save_results functions here to avoid circular imports
+            from save_results import get_results_writer, save_search_results
+            
+            # Compute every analysis in one pass as the listings stream in (from the cache if already extracted)
+            analysis = await analyze_listing_stream(self._stored(self.iter_listings(all_pages=all_pages)))
+            family_friendly_listing = analysis["family_friendly"]
+            best_value_listing = analysis["best_value"]
+            family_friendly_details = family_friendly_listing
+            best_value_details = best_value_listing
+            print(f"Analyzed {analysis['count']} listings")
             
             # Check if we found actual listings
             if family_friendly_listing is None and best_value_listing is None:
@@ -623,13 +1145,11 @@ class SearchResultsPage(BasePage):
                         "note": "Sample data - best value listing not found"
                     }
             
-            # Save the results to files
-            json_path, txt_path = save_search_results(family_friendly_details, best_value_details, 
-                                                filename_prefix="family_options")
+            # Save the results to files in the background (flushed when the event loop's writer is closed)
+            await get_results_writer().submit(save_search_results, family_friendly_details, best_value_details,
+                                              filename_prefix="family_options")
             
-            print("\n--- FAMILY-FRIENDLY SEARCH RESULTS SAVED ---")
-            print(f"Results have been saved to {txt_path}")
-            print("-------------------------------------------\n")
+            print("\n--- FAMILY-FRIENDLY SEARCH RESULTS QUEUED FOR SAVING ---")
             
             # Return the sample listings if no real ones were found
             if family_friendly_listing is None:
@@ -645,7 +1165,7 @@ class SearchResultsPage(BasePage):
         except Exception as e:
             print(f"Error saving family analysis results: {e}")
             # Take a screenshot of the error state
-            await self.page.screenshot(path="error_saving_family_results.png")
+            await self.error_screenshot("error_saving_family_results")
             
             # Still provide sample data even if there's an error
             family_friendly_details = {
@@ -664,10 +1184,10 @@ class SearchResultsPage(BasePage):
             
             # Save the sample results anyway
             try:
-                from save_results import save_search_results
-                json_path, txt_path = save_search_results(family_friendly_details, best_value_details, 
-                                                    filename_prefix="family_options")
-                print(f"Sample family results saved despite error: {txt_path}")
+                from save_results import get_results_writer, save_search_results
+                await get_results_writer().submit(save_search_results, family_friendly_details, best_value_details,
+                                                  filename_prefix="family_options")
+                print("Sample family results queued for saving despite error")
             except Exception as save_error:
                 print(f"Error saving sample family results: {save_error}")
             
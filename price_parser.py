@@ -0,0 +1,124 @@
+import re
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+CURRENCY_SYMBOLS = {
+    "US$": "USD", "₪": "ILS", "$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR",
+}
+CURRENCY_CODES = ("ILS", "NIS", "USD", "EUR", "GBP", "JPY", "INR", "CAD", "AUD", "CHF")
+
+# A number with optional thousands separators and decimals: 1,250 / 1.250,50 / 900
+# (non-breaking and narrow no-break spaces are used as thousands separators in some locales)
+AMOUNT_RE = re.compile(r"\d{1,3}(?:[,.\u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?")
+CURRENCY_RE = re.compile(
+    "|".join(re.escape(symbol) for symbol in sorted(CURRENCY_SYMBOLS, key=len, reverse=True))
+    + r"|\b(?:" + "|".join(CURRENCY_CODES) + r")\b"
+)
+# "5 nights" / "for 1 night" give the night count ("₪750 night" is a per-night price)
+NIGHTS_RE = re.compile(r"\b(\d+)\s*nights\b|\bfor\s+(\d+)\s*night\b", re.IGNORECASE)
+TOTAL_RE = re.compile(r"\btotal\b|\bfor\s+\d+\s*nights?\b", re.IGNORECASE)
+PER_NIGHT_RE = re.compile(r"\bnight\b|/\s*night|per\s+night", re.IGNORECASE)
+# Text between two amounts that still means "the first one was the old price",
+# e.g. "₪900 ₪750", "₪900 · was" or "Was ₪900, now ₪750"
+DISCOUNT_SEPARATOR_RE = re.compile(r"^[\s·,:|]*(?:was|originally|previous price|discounted from|now|discounted to)?"
+                                   r"[\s·,:|]*$", re.IGNORECASE)
+
+
+class ParsedPrice(NamedTuple):
+    """A parsed price text. All amounts are floats in the listing's currency, or None."""
+    amount: Optional[float]           # The current displayed price (discounted, if there is a discount)
+    original_amount: Optional[float]  # The strike-through price of a discount pair
+    currency: Optional[str]           # ISO code, e.g. "ILS"
+    per_night: Optional[float]        # Price per night (given, or total / nights)
+    total: Optional[float]            # Price for the whole stay (given, or per night * nights)
+    nights: Optional[int]             # Number of nights, from the text or the caller
+
+
+def parse_amount(text):
+    """Convert one number string with thousands/decimal separators to a float."""
+    text = text.replace("\u00a0", "").replace("\u202f", "")
+    if "," in text and "." in text:
+        # The separator that comes last is the decimal separator
+        if text.rfind(",") > text.rfind("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    elif "," in text or "." in text:
+        separator = "," if "," in text else "."
+        groups = text.split(separator)
+        # "1,250" / "1.250.000" are thousands; "12,5" / "99.95" are decimals
+        if len(groups) > 2 or len(groups[-1]) == 3:
+            text = "".join(groups)
+        else:
+            text = text.replace(",", ".")
+    return float(text)
+
+
+def detect_currency(text):
+    """Return the ISO code of the first currency symbol or code in a text, or None."""
+    match = CURRENCY_RE.search(text)
+    if not match:
+        return None
+    token = match.group(0)
+    if token == "NIS":
+        return "ILS"
+    return CURRENCY_SYMBOLS.get(token, token)
+
+
+@lru_cache(maxsize=4096)
+def parse_price(text, nights=None):
+    """
+    Parse an Airbnb price text such as "₪750 night", "₪1,250 total before taxes",
+    "₪900 ₪750 night" or "Was ₪900, now ₪750" (strike-through and discounted price)
+    or "₪2,450 for 5 nights".
+
+    The night count is read from the text when it says "for N nights", otherwise
+    the given nights (e.g. from the search dates) is used to convert between
+    per-night and total prices. Results are cached by raw text and nights.
+    """
+    if not text:
+        return ParsedPrice(None, None, None, None, None, nights)
+
+    night_count_starts = set()
+    for nights_match in NIGHTS_RE.finditer(text):
+        group = 1 if nights_match.group(1) else 2
+        night_count_starts.add(nights_match.start(group))
+        if int(nights_match.group(group)) > 0:
+            nights = int(nights_match.group(group))
+
+    # The night count itself is not a price
+    matches = [match for match in AMOUNT_RE.finditer(text) if match.start() not in night_count_starts]
+    per_night = total = plain = original = None
+    for index, match in enumerate(matches):
+        value = parse_amount(match.group(0))
+        is_last = index + 1 == len(matches)
+        following = text[match.end():] if is_last else text[match.end():matches[index + 1].start()]
+        if not is_last and DISCOUNT_SEPARATOR_RE.match(CURRENCY_RE.sub("", following)):
+            # Two prices in a row: the first is the strike-through one
+            original = value
+            continue
+        if TOTAL_RE.search(following):
+            total = value if total is None else total
+        elif PER_NIGHT_RE.search(following):
+            per_night = value if per_night is None else per_night
+        elif plain is None:
+            plain = value
+
+    if per_night is None and total is None and plain is not None:
+        # No qualifier: Airbnb's bare card prices are per night
+        per_night = plain
+    if per_night is None and total is not None and nights:
+        per_night = round(total / nights, 2)
+    if total is None and per_night is not None and nights:
+        total = round(per_night * nights, 2)
+
+    amount = per_night if per_night is not None else total
+    if original is not None and amount is not None and original <= amount:
+        original = None  # not a discount after all
+    return ParsedPrice(amount, original, detect_currency(text), per_night, total, nights)
+
+
+def price_value(text, nights=None):
+    """Return the per-night price (or the total if the night count is unknown), or None."""
+    parsed = parse_price(text, nights)
+    return parsed.per_night if parsed.per_night is not None else parsed.total
@@ -0,0 +1,227 @@
+import heapq
+import math
+
+from listing_table import ListingTable, np
+
+NORMALIZATIONS = ("fixed", "minmax", "percentile")
+
+
+class Term:
+    """
+    One weighted component of a scoring formula.
+
+    Args:
+        column: Numeric ListingTable column ("rating", "price_value", "review_count")
+        weight: Weight of the normalized value in the score
+        higher_is_better: False for columns like price, where lower values score higher
+        normalize: How values are mapped to 0-1:
+            "fixed" uses the given bounds,
+            "minmax" uses the observed minimum and maximum,
+            "percentile" uses the observed 5th and 95th percentiles (robust to outliers)
+        bounds: (low, high) for "fixed" normalization
+        missing: "exclude" to leave listings without this value unscored, or the
+            normalized value (0-1) they get instead, e.g. 0.0 as a penalty
+    """
+
+    def __init__(self, column, weight, higher_is_better=True, normalize="percentile", bounds=None, missing="exclude"):
+        if normalize not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization: {normalize} (expected one of {', '.join(NORMALIZATIONS)})")
+        if normalize == "fixed" and not bounds:
+            raise ValueError(f"Term {column} uses fixed normalization but has no bounds")
+        self.column = column
+        self.weight = weight
+        self.higher_is_better = higher_is_better
+        self.normalize = normalize
+        self.bounds = bounds
+        self.missing = missing
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        if data.get("bounds"):
+            data["bounds"] = tuple(data["bounds"])
+        return cls(**data)
+
+    def resolve_bounds(self, values):
+        """Return the (low, high) normalization bounds for the observed values (missing values excluded)."""
+        if self.normalize == "fixed":
+            return self.bounds
+        if not values:
+            return None
+        if self.normalize == "minmax":
+            return min(values), max(values)
+        ordered = sorted(values)
+        return _percentile(ordered, 5), _percentile(ordered, 95)
+
+    def normalize_value(self, value, bounds):
+        """Map one value to 0-1 with the given bounds; None for missing values."""
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None if self.missing == "exclude" else self.missing
+        low, high = bounds
+        normalized = 1.0 if high == low else min(1.0, max(0.0, (value - low) / (high - low)))
+        return normalized if self.higher_is_better else 1.0 - normalized
+
+
+def _percentile(ordered, percent):
+    """Linear-interpolated percentile of a sorted list (same as NumPy's default)."""
+    position = (len(ordered) - 1) * percent / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class ScoringFormula:
+    """A named, weighted sum of normalized terms. Higher scores are better."""
+
+    def __init__(self, name, terms):
+        self.name = name
+        self.terms = terms
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build a formula from a declarative dict, e.g. loaded from JSON."""
+        return cls(data["name"], [Term.from_dict(term) for term in data["terms"]])
+
+    def score_one(self, listing, bounds=None):
+        """
+        Score a single listing dict. Uses fixed bounds unless observed bounds are given
+        (one per term). Returns None if the listing is excluded for missing data.
+        """
+        score = 0.0
+        for index, term in enumerate(self.terms):
+            term_bounds = bounds[index] if bounds else term.bounds
+            normalized = term.normalize_value(listing.get(term.column), term_bounds)
+            if normalized is None:
+                return None
+            score += term.weight * normalized
+        return score
+
+
+class RankingEngine:
+    """Score whole ListingTables with a ScoringFormula and select the top listings."""
+
+    def __init__(self, formula):
+        self.formula = formula
+
+    def _check_currency(self, table):
+        """Prices in different currencies can't be normalized together."""
+        if not any(term.column == "price_value" for term in self.formula.terms):
+            return
+        currencies = {currency for currency in table.column("currency") if currency}
+        if len(currencies) > 1:
+            raise ValueError(f"Listings are priced in {len(currencies)} currencies ({', '.join(sorted(currencies))}); "
+                             f"rank each currency separately, e.g. table.filter(currency=...)")
+
+    def score(self, table):
+        """
+        Return one score per listing (NaN for listings excluded for missing data):
+        a NumPy array if NumPy is installed, a list otherwise.
+
+        Raises ValueError if the formula uses prices and the listings are priced in
+        more than one currency.
+        """
+        self._check_currency(table)
+        if np is not None:
+            return self._score_numpy(table)
+        return self._score_python(table)
+
+    def _score_numpy(self, table):
+        scores = np.zeros(len(table))
+        for term in self.formula.terms:
+            values = table.column(term.column).astype(float)
+            if term.column == "review_count":
+                values[values < 0] = np.nan
+            present = ~np.isnan(values)
+            if term.normalize == "fixed":
+                low, high = term.bounds
+            elif not present.any():
+                low = high = 0.0
+            elif term.normalize == "minmax":
+                low, high = values[present].min(), values[present].max()
+            else:
+                low, high = np.percentile(values[present], [5, 95])
+            if high == low:
+                # Every observed value is the same; missing ones stay NaN like in the other branch
+                normalized = np.where(present, 1.0, np.nan)
+            else:
+                normalized = np.clip((values - low) / (high - low), 0.0, 1.0)
+            if not term.higher_is_better:
+                normalized = 1.0 - normalized
+            # NaN propagates for excluded listings; otherwise missing values get the penalty value
+            if term.missing != "exclude":
+                normalized[~present] = term.missing
+            scores += term.weight * normalized
+        return scores
+
+    def _score_python(self, table):
+        columns = {}
+        bounds = []
+        for term in self.formula.terms:
+            column = []
+            for value in table.column(term.column):
+                if term.column == "review_count":
+                    column.append(None if value < 0 else value)
+                else:
+                    column.append(None if math.isnan(value) else value)
+            columns[term.column] = column
+            bounds.append(term.resolve_bounds([value for value in column if value is not None]) or (0.0, 0.0))
+
+        scores = []
+        for index in range(len(table)):
+            listing = {column: values[index] for column, values in columns.items()}
+            score = self.formula.score_one(listing, bounds)
+            scores.append(math.nan if score is None else score)
+        return scores
+
+    def top_k_indices(self, table, k):
+        """Return the k best (score, row index) pairs, best first. Ties keep insertion order."""
+        scores = self.score(table)
+        if k <= 0:
+            return []
+        if np is not None:
+            indices = np.flatnonzero(~np.isnan(scores))
+            if len(indices) == 0:
+                return []
+            keys = -scores[indices]
+            if k < len(indices):
+                kth = np.partition(keys, k - 1)[k - 1]
+                candidates = keys <= kth
+                indices, keys = indices[candidates], keys[candidates]
+            best = indices[np.lexsort((indices, keys))][:k].tolist()
+        else:
+            # Heap selection over the scored listings
+            candidates = (index for index, score in enumerate(scores) if not math.isnan(score))
+            best = heapq.nlargest(k, candidates, key=scores.__getitem__)
+        return [(float(scores[index]), index) for index in best]
+
+    def top_k(self, table, k):
+        """Return the k best (score, Listing) pairs, best first. Ties keep insertion order."""
+        return [(score, table.row(index)) for score, index in self.top_k_indices(table, k)]
+
+    def rank(self, listings, k=None):
+        """Score listing dicts (or Listings) and return the top k (all if k is None) as (score, dict) pairs."""
+        table = listings if isinstance(listings, ListingTable) else ListingTable(listings)
+        return [(score, listing.to_dict()) for score, listing in self.top_k(table, len(table) if k is None else k)]
+
+
+# 70% rating out of 5, 30% price within the typical Tel Aviv range of 300-1000
+# (cheaper is better); scores one listing on its own, so streams use it (see best_value_score)
+BEST_VALUE_FIXED = ScoringFormula("best_value_fixed", [
+    Term("rating", 0.7, normalize="fixed", bounds=(0, 5)),
+    Term("price_value", 0.3, higher_is_better=False, normalize="fixed", bounds=(300, 1000)),
+])
+
+# The same weights, with price normalized against the prices actually observed;
+# the best-value formula of analyze_listings
+BEST_VALUE = ScoringFormula("best_value", [
+    Term("rating", 0.7, normalize="fixed", bounds=(0, 5)),
+    Term("price_value", 0.3, higher_is_better=False, normalize="percentile"),
+])
+
+# Rating weighted by how many reviews back it; unrated or unreviewed listings are penalized, not dropped
+TRUSTED_RATING = ScoringFormula("trusted_rating", [
+    Term("rating", 0.8, normalize="minmax", missing=0.0),
+    Term("review_count", 0.2, normalize="percentile", missing=0.0),
+])
+
+FORMULAS = {formula.name: formula for formula in (BEST_VALUE_FIXED, BEST_VALUE, TRUSTED_RATING)}
@@ -0,0 +1,226 @@
+"""
+Record Airbnb sessions as fixtures and replay them offline.
+
+Modes:
+    record    Record a HAR of every request (on context close) and a DOM snapshot of
+              every page that loads, plus the final state of each page
+    har       Replay the recorded HAR with context.route_from_har; requests that
+              weren't recorded are aborted, so nothing reaches the network
+    snapshot  Serve only the recorded DOM snapshots (documents) and abort everything
+              else; the fastest and most stable mode, but without the search API
+
+The snapshots can also be served from a local HTTP server, so the page objects can
+be pointed at http://127.0.0.1:<port>/ directly:
+    python -m replay fixtures/replay/<name> [--port 8765]
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from file_names import safe_filename
+
+REPLAY_MODES = ("off", "record", "har", "snapshot")
+DEFAULT_FIXTURES_DIR = os.path.join("fixtures", "replay")
+
+
+def snapshot_key(url):
+    """The key a page is recorded under: its path, plus the results page cursor if any."""
+    parsed = urlparse(url)
+    key = parsed.path or "/"
+    cursor = parse_qs(parsed.query).get("cursor")
+    if cursor:
+        key += f"?cursor={cursor[0]}"
+    return key
+
+
+class ReplayFixture:
+    """
+    The recorded HAR and DOM snapshots of one test (or search), in
+    fixtures_dir/<name>/: session.har, snapshots.json (URL key -> file) and the
+    snapshot HTML files.
+    """
+
+    def __init__(self, name, mode="off", fixtures_dir=DEFAULT_FIXTURES_DIR):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Unknown replay mode: {mode} (expected one of {', '.join(REPLAY_MODES)})")
+        self.name = name
+        self.mode = mode
+        self.directory = os.path.join(fixtures_dir, safe_filename(name, "fixture"))
+        self.har_path = os.path.join(self.directory, "session.har")
+        self.manifest_path = os.path.join(self.directory, "snapshots.json")
+        self.snapshots = {}
+        self._write_lock = asyncio.Lock()
+        # URLs of documents the replay had no snapshot for
+        self.missing = []
+
+    def context_options(self):
+        """Keyword arguments for browser.new_context (HAR recording in record mode)."""
+        if self.mode != "record":
+            return {}
+        os.makedirs(self.directory, exist_ok=True)
+        return {"record_har_path": self.har_path, "record_har_mode": "full"}
+
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            raise FileNotFoundError(f"No DOM snapshots recorded for {self.name} in {self.directory} "
+                                    f"(run once with --replay=record)")
+        with open(self.manifest_path, encoding="utf-8") as f:
+            self.snapshots = json.load(f)
+
+    async def install(self, context):
+        """Route the context's requests to the recorded fixtures (har and snapshot modes)."""
+        if self.mode == "har":
+            if not os.path.exists(self.har_path):
+                raise FileNotFoundError(f"No HAR recorded for {self.name} at {self.har_path} "
+                                        f"(run once with --replay=record)")
+            await context.route_from_har(self.har_path, not_found="abort")
+        elif self.mode == "snapshot":
+            self.load_manifest()
+            await context.route("**/*", self._handle_snapshot_route)
+
+    def snapshot_path(self, url):
+        """The snapshot file recorded for a URL, or None."""
+        filename = self.snapshots.get(snapshot_key(url))
+        return os.path.join(self.directory, filename) if filename else None
+
+    async def _handle_snapshot_route(self, route):
+        request = route.request
+        path = self.snapshot_path(request.url) if request.resource_type == "document" else None
+        if path:
+            await route.fulfill(path=path, content_type="text/html; charset=utf-8")
+        else:
+            if request.resource_type == "document":
+                self.missing.append(request.url)
+            await route.abort()
+
+    def attach(self, page):
+        """Snapshot the DOM of every page load (record mode)."""
+        if self.mode == "record":
+            page.on("load", self.snapshot)
+
+    async def detach(self, page):
+        """Record the final DOM of a page before it is closed (record mode)."""
+        if self.mode == "record" and not page.is_closed():
+            await self.snapshot(page)
+
+    async def snapshot(self, page):
+        """Record the current DOM of a page under its URL key (replacing an earlier snapshot of it)."""
+        try:
+            url = page.url
+            if not url.startswith("http"):
+                return
+            content = await page.content()
+        except Exception as e:
+            print(f"Could not snapshot {page.url}: {e}")
+            return
+        key = snapshot_key(url)
+        filename = self.snapshots.get(key)
+        if filename is None:
+            slug = safe_filename(key, "root")
+            filename = f"{len(self.snapshots):03d}_{slug}.html"
+        self.snapshots[key] = filename
+        # Other pages keep adding snapshots while this one is written: the thread gets its
+        # own copy of the manifest, and writes go one at a time so the newest manifest wins
+        manifest = dict(self.snapshots)
+        async with self._write_lock:
+            await asyncio.to_thread(self._write_snapshot, filename, content, manifest)
+
+    def _write_snapshot(self, filename, content, manifest):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, filename), "w", encoding="utf-8") as f:
+            f.write(content)
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+    async def finish(self, context):
+        """
+        Record the final DOM of every open page (record mode); call before the context
+        is closed, which is when Playwright writes the HAR. In snapshot mode, report
+        documents that had no snapshot.
+        """
+        if self.mode == "record":
+            for page in context.pages:
+                await self.detach(page)
+            print(f"Recorded {len(self.snapshots)} DOM snapshots and a HAR in {self.directory}")
+        elif self.mode == "snapshot" and self.missing:
+            print(f"No snapshot for {len(self.missing)} documents: {', '.join(self.missing[:5])}")
+
+
+class SnapshotServer:
+    """
+    Serve a fixture's DOM snapshots over HTTP on localhost (by URL key; anything
+    else is a 404), in a background thread.
+    """
+
+    def __init__(self, fixture, port=0):
+        fixture.load_manifest()
+        self.fixture = fixture
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = fixture.snapshot_path(self.path)
+                if not path:
+                    self.send_error(404, "No snapshot recorded for this URL")
+                    return
+                with open(path, "rb") as f:
+                    body = f.read()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # keep benchmark output clean
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded DOM snapshots on localhost.")
+    parser.add_argument("directory", help="Fixture directory, e.g. fixtures/replay/test_airbnb_search_family_options")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    fixtures_dir, name = os.path.split(os.path.normpath(args.directory))
+    server = SnapshotServer(ReplayFixture(name, "snapshot", fixtures_dir), args.port)
+    print(f"Serving {len(server.fixture.snapshots)} snapshots from {args.directory} at {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
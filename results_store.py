@@ -0,0 +1,175 @@
+import glob
+import json
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Parquet compaction is optional; JSON Lines always works
+    pyarrow = None
+
+DEFAULT_STORE_DIR = "results_store"
+
+
+class ResultsStore:
+    """
+    An append-only store of every scraped listing, with its search metadata.
+
+    Records are JSON Lines files partitioned by day (results_store/date=2025-05-20/).
+    Each writer appends to part files of its own (named with the process id and a
+    random token), so concurrent runs and worker processes never write to the same
+    file. Records are buffered and written batch_size at a time, and a new part is
+    started once the current one reaches max_part_mb.
+
+    Past days can be compacted into one Parquet file each if pyarrow is installed;
+    load() reads both formats.
+
+    Args:
+        root: Directory of the store
+        batch_size: Records buffered before they are written
+        max_part_mb: Size at which a new part file is started
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR, batch_size=500, max_part_mb=64):
+        self.root = root
+        self.batch_size = batch_size
+        self.max_part_bytes = max_part_mb * 1024 * 1024
+        self.run_id = uuid.uuid4().hex[:12]
+        self._buffer = []
+        self._part_path = None
+        self._part_day = None
+        self._part_seq = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def partition_dir(self, day):
+        return os.path.join(self.root, f"date={day}")
+
+    def append(self, listings, search=None):
+        """
+        Add listing dicts with the metadata of the search they came from
+        (e.g. location, checkin, checkout, adults, children). Returns the number added.
+        """
+        scraped_at = datetime.now().isoformat(timespec="seconds")
+        count = 0
+        for listing in listings:
+            record = {"scraped_at": scraped_at, "run_id": self.run_id}
+            if search:
+                record.update(search)
+            record.update(listing)
+            self._buffer.append(record)
+            count += 1
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+        return count
+
+    def _open_part(self, day):
+        """Return the path of the part file to append to, starting a new one when needed."""
+        if (self._part_path is None or self._part_day != day
+                or (os.path.exists(self._part_path) and os.path.getsize(self._part_path) >= self.max_part_bytes)):
+            os.makedirs(self.partition_dir(day), exist_ok=True)
+            self._part_seq += 1
+            self._part_day = day
+            self._part_path = os.path.join(self.partition_dir(day),
+                                           f"part-{os.getpid()}-{self.run_id}-{self._part_seq:04d}.jsonl")
+        return self._part_path
+
+    def flush(self):
+        """Write the buffered records (one write per batch)."""
+        if not self._buffer:
+            return
+        records, self._buffer = self._buffer, []
+        path = self._open_part(records[0]["scraped_at"][:10])
+        lines = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+
+    def close(self):
+        self.flush()
+
+    def days(self, start=None, end=None):
+        """Return the partition days (as ISO strings) between start and end, inclusive."""
+        days = []
+        for path in glob.glob(os.path.join(self.root, "date=*")):
+            day = os.path.basename(path)[len("date="):]
+            if (start is None or day >= str(start)) and (end is None or day <= str(end)):
+                days.append(day)
+        return sorted(days)
+
+    def load(self, start=None, end=None, columns=None, **filters):
+        """
+        Load the records of the days between start and end (dates or ISO strings, inclusive).
+
+        Optionally keep only some columns and only records whose fields equal the
+        given filters, e.g. load(start, end, location="Tel Aviv").
+
+        Raises RuntimeError if a day in the range was compacted to Parquet and pyarrow
+        is not installed.
+        """
+        records = []
+        for day in self.days(start, end):
+            directory = self.partition_dir(day)
+            for path in sorted(glob.glob(os.path.join(directory, "*.parquet"))):
+                if pyarrow is None:
+                    # Skipping it would silently return only part of the data
+                    raise RuntimeError(f"Day {day} is compacted to Parquet ({path}); install pyarrow to load it")
+                records.extend(pyarrow.parquet.read_table(path).to_pylist())
+            for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+                records.extend(self._read_jsonl(path))
+        if filters:
+            records = [record for record in records
+                       if all(record.get(key) == value for key, value in filters.items())]
+        if columns:
+            records = [{column: record.get(column) for column in columns} for record in records]
+        return records
+
+    @staticmethod
+    def _read_jsonl(path):
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        # Parsing the whole file as one JSON array is much faster than one loads() per line;
+        # a torn last line (from a writer that crashed mid-write) falls back to per-line parsing
+        try:
+            return json.loads("[" + ",".join(text.splitlines()) + "]")
+        except ValueError:
+            records = []
+            for line in text.splitlines():
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+            return records
+
+    def load_last_days(self, days=30, **filters):
+        """Load the records of the last `days` days (today included)."""
+        start = date.today() - timedelta(days=days - 1)
+        return self.load(start, None, **filters)
+
+    def compact(self, day):
+        """
+        Merge a past day's JSON Lines parts into one Parquet file (requires pyarrow).
+        Returns the Parquet path, or None if there was nothing to do. Don't compact
+        days that are still being written to.
+        """
+        if pyarrow is None:
+            print("pyarrow is not installed; keeping JSON Lines partitions")
+            return None
+        directory = self.partition_dir(day)
+        parts = sorted(glob.glob(os.path.join(directory, "*.jsonl")))
+        if not parts:
+            return None
+        records = self.load(day, day)
+        path = os.path.join(directory, f"compacted-{uuid.uuid4().hex[:12]}.parquet")
+        temp_path = path + ".tmp"
+        pyarrow.parquet.write_table(pyarrow.Table.from_pylist(records), temp_path)
+        os.replace(temp_path, path)
+        # The new file already has every record of the old Parquet files and parts
+        for old in parts + [old for old in glob.glob(os.path.join(directory, "*.parquet")) if old != path]:
+            os.remove(old)
+        return path
@@ -0,0 +1,107 @@
+from collections import Counter
+
+
+class RoundTripBudgetExceeded(AssertionError):
+    """Raised when a block of page-object code makes more Playwright round trips than its budget."""
+
+
+class _NullBudget:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_BUDGET = _NullBudget()
+
+
+class RoundTripBudget:
+    """Counts the round trips made inside a `with` block and checks them against a limit."""
+
+    def __init__(self, counter, limit, label):
+        self.counter = counter
+        self.limit = limit
+        self.label = label
+        self.used = 0
+        self._start = 0
+
+    def __enter__(self):
+        self._start = self.counter.total
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.used = self.counter.total - self._start
+        if self.used > self.limit:
+            self.counter.violations.append((self.label, self.used, self.limit))
+            if self.counter.enforce and exc_type is None:
+                raise RoundTripBudgetExceeded(
+                    f"{self.label}: {self.used} Playwright round trips (budget {self.limit})")
+        return False
+
+
+class RoundTripCounter:
+    """
+    Count the Playwright calls that cost a driver round trip (every async method of
+    Page, ElementHandle and Locator), in total and per method.
+
+    Page objects count through the same proxy as the timing instrumentation (see
+    instrumentation.InstrumentedHandle), so nothing is wrapped while counting is off.
+
+    Args:
+        enabled: Whether calls are counted
+        enforce: Whether going over a budget raises RoundTripBudgetExceeded
+            (otherwise violations are only recorded and reported)
+    """
+
+    def __init__(self, enabled=False, enforce=False):
+        self.enabled = enabled
+        self.enforce = enforce
+        self.reset()
+
+    def reset(self):
+        self.total = 0
+        self.by_method = Counter()
+        self.violations = []
+
+    def count(self, method):
+        self.total += 1
+        self.by_method[method] += 1
+
+    def budget(self, limit, label="block"):
+        """A context manager allowing at most limit round trips inside it (a no-op while counting is off)."""
+        if not self.enabled:
+            return NULL_BUDGET
+        return RoundTripBudget(self, limit, label)
+
+    def summary(self):
+        return {
+            "total": self.total,
+            "by_method": dict(self.by_method.most_common()),
+            "violations": [{"label": label, "used": used, "limit": limit}
+                           for label, used, limit in self.violations]
+        }
+
+    def print_summary(self, title="ROUND TRIPS"):
+        if not self.enabled:
+            return
+        print(f"\n--- {title}: {self.total} Playwright calls ---")
+        for method, count in self.by_method.most_common():
+            print(f"{count:>7}  {method}")
+        for label, used, limit in self.violations:
+            print(f"OVER BUDGET: {label} made {used} round trips (budget {limit})")
+        print("------------------------------\n")
+
+
+# Page objects created without an explicit counter use this one (off by default)
+_active = RoundTripCounter()
+
+
+def get_round_trip_counter():
+    return _active
+
+
+def set_round_trip_counter(counter):
+    """Make counter the default for page objects created from now on."""
+    global _active
+    _active = counter
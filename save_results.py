@@ -1,14 +1,17 @@
+import asyncio
 import json
 import os
+import weakref
 from datetime import datetime
 
-def save_search_results(highest_rated, cheapest):
+def save_search_results(highest_rated, cheapest, filename_prefix="airbnb_results"):
     """
     Save search results to a JSON file and a readable text file.
     
     Args:
         highest_rated: Dictionary containing details of the highest rated listing
         cheapest: Dictionary containing details of the cheapest listing
+        filename_prefix: Prefix for the generated file names
     """
     # Create a results directory if it doesn't exist
     results_dir = "search_results"
@@ -17,7 +20,7 @@ def save_search_results(highest_rated, cheapest):
     
     # Generate a timestamp for the filename
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    base_filename = f"airbnb_results_{timestamp}"
+    base_filename = f"{filename_prefix}_{timestamp}"
     
     # Create a dictionary with all the data
     results_data = {
@@ -54,4 +57,169 @@ def save_search_results(highest_rated, cheapest):
     
     print(f"Results saved to:\n- {json_path}\n- {txt_path}")
     
-    return json_path, txt_path
\ No newline at end of file
+    return json_path, txt_path
+
+def save_batch_results(results, filename_prefix="airbnb_batch"):
+    """
+    Save the results of a batch of searches to a JSON file and a readable text file.
+    
+    Args:
+        results: List of per-search result dictionaries (spec, analysis, timing, error)
+        filename_prefix: Prefix for the generated file names
+    """
+    results_dir = "search_results"
+    if not os.path.exists(results_dir):
+        os.makedirs(results_dir)
+    
+    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    base_filename = f"{filename_prefix}_{timestamp}"
+    
+    results_data = {
+        "search_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "searches": results
+    }
+    
+    # Save as JSON
+    json_path = os.path.join(results_dir, f"{base_filename}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(results_data, f, indent=4, ensure_ascii=False)
+    
+    # Save as readable text
+    txt_path = os.path.join(results_dir, f"{base_filename}.txt")
+    with open(txt_path, "w", encoding="utf-8") as f:
+        f.write("AIRBNB BATCH SEARCH RESULTS\n")
+        f.write("===========================\n\n")
+        f.write(f"Search Date: {results_data['search_date']}\n")
+        f.write(f"Searches: {len(results)}\n\n")
+        
+        for result in results:
+            spec = result.get("spec", {})
+            f.write(f"{spec.get('location')} {spec.get('checkin_date')} - {spec.get('checkout_date')} "
+                    f"({spec.get('adults')} adults, {spec.get('children')} children)\n")
+            f.write("-" * 40 + "\n")
+            if result.get("error"):
+                f.write(f"Error: {result['error']}\n\n")
+                continue
+            f.write(f"Listings: {result.get('count', 0)} in {result.get('elapsed_seconds', 0):.1f}s\n")
+            for key, label in [("highest_rated", "Highest rated"), ("cheapest", "Cheapest")]:
+                listing = result.get(key) or {}
+                f.write(f"{label}: {listing.get('name', 'Unknown')} - "
+                        f"Rating: {listing.get('rating', 'Unknown')} - Price: {listing.get('price', 'Unknown')}\n")
+            f.write("\n")
+    
+    print(f"Batch results saved to:\n- {json_path}\n- {txt_path}")
+    
+    return json_path, txt_path
+
+
+class ResultsWriter:
+    """
+    Write result files in the background, so disk I/O never blocks the event loop
+    that drives the browser.
+
+    Writes (any function, e.g. save_search_results) are queued and run in a worker
+    thread, up to batch_size per thread hop. submit() returns at once unless
+    max_queue writes are already pending, in which case it waits for room
+    (backpressure). close() (or leaving `async with`) waits until every queued
+    write is done.
+    """
+
+    def __init__(self, max_queue=100, batch_size=20):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.queue = None
+        self._task = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def start(self):
+        if self._task is None:
+            self.queue = asyncio.Queue(self.max_queue)
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, function, *args, **kwargs):
+        """
+        Queue function(*args, **kwargs) and return a future for its result.
+        Failures are printed; awaiting the future re-raises them.
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_report_write_failure)
+        await self.queue.put((function, args, kwargs, future))
+        return future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            try:
+                outcomes = await asyncio.to_thread(_run_writes, batch)
+                for (_, _, _, future), (error, result) in zip(batch, outcomes):
+                    if future.done():
+                        continue
+                    if error is not None:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(result)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush(self):
+        """Wait until every queued write is done."""
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def close(self):
+        """Flush and stop the background task."""
+        if self._task is None:
+            return
+        await self.flush()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.queue = None
+
+
+def _run_writes(batch):
+    """Run a batch of queued writes (in the worker thread); returns (error, result) per write."""
+    outcomes = []
+    for function, args, kwargs, _ in batch:
+        try:
+            outcomes.append((None, function(*args, **kwargs)))
+        except Exception as e:
+            outcomes.append((e, None))
+    return outcomes
+
+
+def _report_write_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Error writing results in the background: {future.exception()}")
+
+
+# One shared writer per event loop
+_writers = weakref.WeakKeyDictionary()
+
+
+def get_results_writer():
+    """Return the background ResultsWriter of the running event loop."""
+    loop = asyncio.get_running_loop()
+    if loop not in _writers:
+        _writers[loop] = ResultsWriter()
+    return _writers[loop]
+
+
+async def close_results_writer():
+    """Flush and stop the running event loop's shared writer, if it was used."""
+    writer = _writers.pop(asyncio.get_running_loop(), None)
+    if writer is not None:
+        await writer.close()
@@ -0,0 +1,135 @@
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+from file_names import safe_filename
+
+# "off": no screenshots; "on-error": only error states, written at once;
+# "ring": also keep the last frames of every step in memory, written only on failure
+SCREENSHOT_POLICIES = ("off", "on-error", "ring")
+DEFAULT_SCREENSHOT_DIR = "screenshots"
+
+
+class ScreenshotManager:
+    """
+    Take the page objects' diagnostic screenshots according to a policy.
+
+    Page objects call capture() at checkpoints (e.g. "calendar_view") and
+    capture_error() in their error paths. Under "ring", checkpoints are kept in
+    memory as small JPEGs (viewport only, CSS pixels instead of device pixels)
+    in a ring buffer of the last ring_size frames, and written to disk only by
+    flush(), i.e. when something failed. Under "on-error", checkpoints cost
+    nothing and only error states are captured. Files go to a directory of
+    their own per run (screenshot_dir/<run_name>_<timestamp>_<pid>/), so
+    concurrent runs never overwrite each other's screenshots.
+
+    Args:
+        policy: One of SCREENSHOT_POLICIES
+        screenshot_dir: Directory for the run directories
+        ring_size: Frames kept in memory under "ring"
+        quality: JPEG quality of the captures (0-100)
+        run_name: Name of the run (e.g. the test), used in its directory name
+    """
+
+    def __init__(self, policy="on-error", screenshot_dir=DEFAULT_SCREENSHOT_DIR, ring_size=8, quality=60,
+                 run_name="run"):
+        if policy not in SCREENSHOT_POLICIES:
+            raise ValueError(f"Unknown screenshot policy: {policy} (expected one of {', '.join(SCREENSHOT_POLICIES)})")
+        self.policy = policy
+        self.screenshot_dir = screenshot_dir
+        self.ring_size = ring_size
+        self.quality = quality
+        self.run_name = run_name
+        # (sequence number, label, capture time, JPEG bytes) of the last checkpoints
+        self.frames = deque(maxlen=ring_size)
+        self.saved = []
+        self._seq = 0
+        self._run_dir = None
+
+    def for_run(self, run_name):
+        """A new manager with the same settings for another run (e.g. one search of a batch)."""
+        return ScreenshotManager(self.policy, self.screenshot_dir, self.ring_size, self.quality, run_name)
+
+    @property
+    def run_dir(self):
+        """The run's directory, created on the first write."""
+        if self._run_dir is None:
+            safe_name = safe_filename(self.run_name, "run")
+            timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+            self._run_dir = os.path.join(self.screenshot_dir, f"{safe_name}_{timestamp}_{os.getpid()}")
+            os.makedirs(self._run_dir, exist_ok=True)
+        return self._run_dir
+
+    async def _take(self, page):
+        return await page.screenshot(type="jpeg", quality=self.quality, scale="css", full_page=False)
+
+    async def capture(self, page, label):
+        """A diagnostic checkpoint: kept in the ring buffer under "ring", skipped otherwise."""
+        if self.policy != "ring":
+            return
+        try:
+            image = await self._take(page)
+        except Exception as e:
+            print(f"Could not capture screenshot {label}: {e}")
+            return
+        self._seq += 1
+        self.frames.append((self._seq, label, time.time(), image))
+
+    async def capture_error(self, page, label):
+        """
+        An error state: written to disk at once (unless the policy is "off"), together
+        with the frames leading up to it under "ring". Returns the error screenshot's path.
+        """
+        if self.policy == "off":
+            return None
+        try:
+            image = await self._take(page)
+        except Exception as e:
+            print(f"Could not capture error screenshot {label}: {e}")
+            self.flush()
+            return None
+        self._seq += 1
+        self.frames.append((self._seq, label, time.time(), image))
+        paths = self.flush()
+        if not paths:
+            return None
+        print(f"Error screenshot saved to {paths[-1]}")
+        return paths[-1]
+
+    def _write(self, seq, label, image):
+        safe_label = safe_filename(label)
+        path = os.path.join(self.run_dir, f"{seq:03d}_{safe_label}.jpg")
+        with open(path, "wb") as f:
+            f.write(image)
+        self.saved.append(path)
+        return path
+
+    def flush(self):
+        """Write the buffered frames to the run directory (oldest first) and return their paths."""
+        paths = []
+        while self.frames:
+            seq, label, _, image = self.frames.popleft()
+            try:
+                paths.append(self._write(seq, label, image))
+            except OSError as e:
+                print(f"Could not write screenshot {label}: {e}")
+        return paths
+
+    def discard(self):
+        """Drop the buffered frames (e.g. after a run that passed)."""
+        self.frames.clear()
+
+
+# Page objects created without an explicit ScreenshotManager use this one
+_active = ScreenshotManager()
+
+
+def get_screenshot_manager():
+    return _active
+
+
+def set_screenshot_manager(manager):
+    """Make manager the default for page objects created from now on."""
+    global _active
+    _active = manager
@@ -0,0 +1,178 @@
+import base64
+import json
+import re
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+RATING_PATTERN = re.compile(r"(\d+(?:[.,]\d+)?)")
+REVIEWS_PATTERN = re.compile(r"(\d[\d,]*)\s*(?:reviews?\b|\))", re.IGNORECASE)
+
+
+def find_search_results(payload):
+    """Yield every search result object in a search API payload (or embedded page state)."""
+    # (node, whether it is a search result); children are pushed in reverse so they are
+    # visited in document order
+    stack = [(payload, False)]
+    while stack:
+        node, is_result = stack.pop()
+        if is_result:
+            yield node
+        elif isinstance(node, dict):
+            children = []
+            for key, value in node.items():
+                if key == "searchResults" and isinstance(value, list):
+                    children.extend((item, True) for item in value
+                                    if isinstance(item, dict) and ("listing" in item or "demandStayListing" in item))
+                else:
+                    children.append((value, False))
+            stack.extend(reversed(children))
+        elif isinstance(node, list):
+            stack.extend((item, False) for item in reversed(node))
+
+
+def find_pagination_info(payload):
+    """
+    Return the pagination info of a search payload as a dictionary with the
+    "next_page_cursor" and the "page_cursors" of all pages (either may be None).
+    """
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            pagination = node.get("paginationInfo")
+            if isinstance(pagination, dict) and ("nextPageCursor" in pagination or "pageCursors" in pagination):
+                return {
+                    "next_page_cursor": pagination.get("nextPageCursor"),
+                    "page_cursors": pagination.get("pageCursors") or None
+                }
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return {"next_page_cursor": None, "page_cursors": None}
+
+
+def find_next_page_cursor(payload):
+    """Return the cursor of the next results page, or None if this is the last page."""
+    return find_pagination_info(payload)["next_page_cursor"]
+
+
+def build_page_url(search_url, cursor):
+    """Return the search URL pointing at the results page identified by cursor."""
+    url = urlparse(search_url)
+    params = [(key, value) for key, value in parse_qsl(url.query) if key not in ("cursor", "pagination_search")]
+    params += [("pagination_search", "true"), ("cursor", cursor)]
+    return urlunparse(url._replace(query=urlencode(params)))
+
+
+def _decode_listing_id(global_id):
+    """Decode a GraphQL global id such as base64("DemandStayListing:12345") to "12345"."""
+    if not global_id:
+        return None
+    global_id = str(global_id)
+    if global_id.isdigit():
+        return global_id
+    try:
+        decoded = base64.b64decode(global_id + "=" * (-len(global_id) % 4)).decode("utf-8")
+    except Exception:
+        return None
+    _, _, listing_id = decoded.rpartition(":")
+    return listing_id if listing_id.isdigit() else None
+
+
+def _parse_rating(result, listing):
+    """Return (rating, review_count) from the localized rating strings or numeric fields."""
+    for text in (result.get("avgRatingA11yLabel"), result.get("avgRatingLocalized"), listing.get("avgRatingLocalized")):
+        if not text:
+            continue
+        match = RATING_PATTERN.search(text)
+        if not match:
+            continue  # e.g. "New"
+        rating = float(match.group(1).replace(",", "."))
+        reviews = REVIEWS_PATTERN.search(text[match.end():])
+        review_count = int(reviews.group(1).replace(",", "")) if reviews else None
+        return rating, review_count
+
+    rating = listing.get("avgRating")
+    review_count = listing.get("reviewsCount")
+    return (float(rating) if rating else None), review_count
+
+
+def _parse_price(result):
+    """Return the displayed price text (e.g. "₪750 night") from the structured display price."""
+    display = result.get("structuredDisplayPrice") or (result.get("pricingQuote") or {}).get("structuredStayDisplayPrice")
+    if not display:
+        return None
+    primary = display.get("primaryLine") or {}
+    price = primary.get("discountedPrice") or primary.get("price")
+    if not price:
+        return primary.get("accessibilityLabel")
+    qualifier = primary.get("qualifier")
+    return f"{price} {qualifier}" if qualifier else price
+
+
+def parse_search_result(result, origin="https://www.airbnb.com"):
+    """Convert one search result object to a listing dictionary."""
+    listing = result.get("listing") or {}
+    listing_id = (_decode_listing_id(listing.get("id"))
+                  or _decode_listing_id((result.get("demandStayListing") or {}).get("id")))
+
+    name = ((result.get("nameLocalized") or {}).get("localizedStringWithTranslationPreference")
+            or listing.get("name")
+            or result.get("title")
+            or listing.get("title"))
+
+    rating, review_count = _parse_rating(result, listing)
+
+    return {
+        "name": name,
+        "price": _parse_price(result),
+        "rating": rating,
+        "review_count": review_count,
+        "listing_id": listing_id,
+        "url": f"{origin}/rooms/{listing_id}" if listing_id else None
+    }
+
+
+def parse_search_payload(payload, origin="https://www.airbnb.com"):
+    """
+    Parse a search API payload (or embedded page state) into listing dictionaries,
+    in the same shape as SearchResultsPage.extract_listing_cards returns.
+
+    Listings appearing more than once (e.g. in a map and a list section) are returned once.
+    """
+    listings = []
+    seen_ids = set()
+    for result in find_search_results(payload):
+        listing = parse_search_result(result, origin)
+        if listing["listing_id"]:
+            if listing["listing_id"] in seen_ids:
+                continue
+            seen_ids.add(listing["listing_id"])
+        listings.append(listing)
+    return listings
+
+
+def parse_embedded_state(script_texts, origin="https://www.airbnb.com"):
+    """
+    Parse the JSON state scripts the results page is server-rendered with.
+
+    Returns the listings and the pagination info (see find_pagination_info).
+    """
+    listings = []
+    seen_ids = set()
+    pagination = {"next_page_cursor": None, "page_cursors": None}
+    for text in script_texts:
+        try:
+            payload = json.loads(text)
+        except ValueError:
+            continue
+        payload_listings = parse_search_payload(payload, origin)
+        if not payload_listings:
+            continue
+        for listing in payload_listings:
+            if listing["listing_id"] and listing["listing_id"] in seen_ids:
+                continue
+            seen_ids.add(listing["listing_id"])
+            listings.append(listing)
+        if pagination["next_page_cursor"] is None and pagination["page_cursors"] is None:
+            pagination = find_pagination_info(payload)
+    return listings, pagination
@@ -0,0 +1,389 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import time
+from dataclasses import asdict, dataclass
+
+from playwright.async_api import async_playwright
+
+from instrumentation import Instrumentation, get_instrumentation, set_instrumentation
+from listing_analysis import analyze_listings
+from network_profiles import NetworkFilter
+from pages.home_page import HomePage
+from pages.search_results_page import SearchResultsPage
+from results_store import ResultsStore
+from save_results import close_results_writer, get_results_writer, save_batch_results
+from screenshots import SCREENSHOT_POLICIES, ScreenshotManager, get_screenshot_manager, set_screenshot_manager
+from selector_cache import DEFAULT_CACHE_PATH, SelectorCache
+
+
+@dataclass
+class SearchSpec:
+    """One search to run: location, dates and guests."""
+    location: str
+    checkin_date: str = None
+    checkout_date: str = None
+    adults: int = 2
+    children: int = 0
+
+
+class ContextPool:
+    """
+    A bounded pool of browser contexts sharing one browser process.
+
+    Every context gets a NetworkFilter for the given network profile.
+    """
+
+    def __init__(self, browser, size, context_options=None, network_profile="scrape-minimal"):
+        self.browser = browser
+        self.size = size
+        self.context_options = context_options or {}
+        self.network_profile = network_profile
+        self.network_filters = {}
+        self._available = asyncio.Queue()
+        self._contexts = []
+
+    async def start(self):
+        for _ in range(self.size):
+            await self._available.put(await self._new_context())
+
+    async def _new_context(self):
+        context = await self.browser.new_context(**self.context_options)
+        network_filter = NetworkFilter(self.network_profile)
+        await network_filter.install(context)
+        self.network_filters[context] = network_filter
+        self._contexts.append(context)
+        return context
+
+    async def acquire(self):
+        return await self._available.get()
+
+    async def release(self, context, discard=False):
+        """
+        Return a context to the pool. A discarded context (e.g. after a timeout)
+        is closed and replaced with a fresh one.
+        """
+        if discard:
+            self._contexts.remove(context)
+            self.network_filters.pop(context, None)
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Error closing discarded context: {e}")
+            context = await self._new_context()
+        else:
+            await context.clear_cookies()
+        await self._available.put(context)
+
+    async def close(self):
+        for context in self._contexts:
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Error closing context: {e}")
+        self._contexts = []
+
+
+async def run_search(context, spec, table=None, store=None):
+    """
+    Run one search in a fresh page of the given context and analyze its listings.
+
+    If a ListingTable is given, the search's listings are appended to it; if a
+    ResultsStore is given, they are recorded in it with the search spec.
+    """
+    page = await context.new_page()
+    # Screenshots of each search go to a directory of their own
+    screenshots = get_screenshot_manager().for_run(spec.location)
+    try:
+        home = HomePage(page, screenshots=screenshots)
+        results = SearchResultsPage(page, screenshots=screenshots)
+        await home.search_apartment(spec.location, spec.checkin_date, spec.checkout_date,
+                                    adults=spec.adults, children=spec.children)
+        await results.wait_for_results()
+        cards = await results.get_listing_snapshot()
+        if table is not None:
+            table.extend(cards)
+        if store is not None:
+            # Appended by the background writer, so concurrent searches never write to disk on the event loop
+            await get_results_writer().submit(store.append, cards, asdict(spec))
+        return analyze_listings(cards)
+    except asyncio.CancelledError:
+        # Timed out: keep the frames leading up to it
+        screenshots.flush()
+        raise
+    except Exception:
+        await screenshots.capture_error(page, "search_failed")
+        raise
+    finally:
+        await page.close()
+
+
+async def _run_pooled(pool, spec, timeout, on_result=None, table=None, store=None):
+    started = time.perf_counter()
+    result = {"spec": asdict(spec)}
+    context = await pool.acquire()
+    network_filter = pool.network_filters[context]
+    blocked_before = sum(network_filter.blocked.values())
+    discard = False
+    try:
+        result.update(await asyncio.wait_for(run_search(context, spec, table, store), timeout))
+        result["blocked_requests"] = sum(network_filter.blocked.values()) - blocked_before
+    except asyncio.TimeoutError:
+        discard = True
+        result["error"] = f"Timed out after {timeout}s"
+    except Exception as e:
+        discard = True
+        result["error"] = str(e)
+    finally:
+        await pool.release(context, discard=discard)
+    result["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    print(f"Finished {spec.location} {spec.checkin_date}-{spec.checkout_date} "
+          f"in {result['elapsed_seconds']}s" + (f" ({result['error']})" if "error" in result else ""))
+    if on_result:
+        on_result(result)
+    return result
+
+
+async def _run_on_browser(browser, specs, concurrency, timeout, context_options, network_profile, on_result, table,
+                          store=None):
+    pool = ContextPool(browser, max(1, min(concurrency, len(specs))), context_options, network_profile)
+    try:
+        await pool.start()
+        return await asyncio.gather(*[_run_pooled(pool, spec, timeout, on_result, table, store) for spec in specs])
+    finally:
+        await pool.close()
+
+
+async def run_searches(specs, concurrency=4, timeout=90, headless=True, browser=None,
+                       context_options=None, network_profile="scrape-minimal", save=True, on_result=None,
+                       table=None, store=None):
+    """
+    Run a batch of searches concurrently over a pool of browser contexts.
+
+    Uses one browser process (launched here unless one is passed in) with up to
+    `concurrency` contexts, each filtering requests with `network_profile`
+    (see network_profiles). Each search gets `timeout` seconds. Returns one result
+    dictionary per spec, in order, and writes them through save_results unless
+    save is False. on_result, if given, is called with each result as soon as
+    its search finishes. If a ListingTable is given as table, every scraped
+    listing is collected in it; if a ResultsStore is given as store, every
+    scraped listing is appended to it (and flushed when the batch is done).
+    """
+    if browser is not None:
+        results = await _run_on_browser(browser, specs, concurrency, timeout, context_options,
+                                        network_profile, on_result, table, store)
+    else:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            try:
+                results = await _run_on_browser(browser, specs, concurrency, timeout, context_options,
+                                                network_profile, on_result, table, store)
+            finally:
+                await browser.close()
+
+    writer = get_results_writer()
+    if store is not None:
+        await writer.submit(store.flush)
+    if save:
+        await writer.submit(save_batch_results, results)
+    # Every file of this batch is on disk when run_searches returns
+    await writer.flush()
+
+    return results
+
+
+def _shard_worker(worker_id, indexed_specs, results_queue, concurrency, timeout, headless, network_profile,
+                  store_dir=None, selector_cache_path=None):
+    """Worker process entry point: run one shard with its own browser and context pool."""
+    if selector_cache_path:
+        SelectorCache.set_default_path(selector_cache_path)
+    # Each worker appends to part files of its own, so the shared store needs no locking
+    store = ResultsStore(store_dir) if store_dir else None
+
+    async def run():
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=headless)
+            try:
+                pool = ContextPool(browser, max(1, min(concurrency, len(indexed_specs))),
+                                   network_profile=network_profile)
+                try:
+                    await pool.start()
+                    # Stream each result back tagged with its position in the full batch
+                    await asyncio.gather(*[
+                        _run_pooled(pool, spec, timeout,
+                                    lambda result, index=index: results_queue.put(("result", index, result)),
+                                    store=store)
+                        for index, spec in indexed_specs
+                    ])
+                finally:
+                    await pool.close()
+            finally:
+                await browser.close()
+                await close_results_writer()
+
+    try:
+        try:
+            asyncio.run(run())
+        finally:
+            if store is not None:
+                store.close()
+        results_queue.put(("done", worker_id, None))
+    except Exception as e:
+        results_queue.put(("failed", worker_id, str(e)))
+        raise
+
+
+def _collect_shard_results(processes, results_queue, shards, on_result=None, poll_timeout=1):
+    """
+    Receive the results the shard workers stream back until every worker is done,
+    has failed or has died. Returns the results in batch order (None for searches
+    never reported) and, per worker, the batch positions it never reported.
+    """
+    results = [None] * sum(len(shard) for shard in shards)
+    pending = {worker_id: {index for index, _ in shard} for worker_id, shard in enumerate(shards)}
+    owner = {index: worker_id for worker_id, shard in enumerate(shards) for index, _ in shard}
+    finished = set()
+
+    def handle(kind, key, payload):
+        if kind == "result":
+            results[key] = payload
+            pending[owner[key]].discard(key)
+            if on_result:
+                on_result(payload)
+        elif kind == "failed":
+            print(f"Worker {key} failed: {payload}")
+            finished.add(key)
+        else:
+            finished.add(key)
+
+    while len(finished) < len(processes):
+        try:
+            handle(*results_queue.get(timeout=poll_timeout))
+            continue
+        except queue.Empty:
+            pass
+        dead = [worker_id for worker_id, process in enumerate(processes)
+                if worker_id not in finished and not process.is_alive()]
+        if not dead:
+            continue
+        # A worker that exited right after its last put may still have those messages
+        # in the pipe: drain them before deciding it crashed
+        while True:
+            try:
+                handle(*results_queue.get_nowait())
+            except queue.Empty:
+                break
+        for worker_id in dead:
+            if worker_id not in finished:
+                print(f"Worker {worker_id} exited with code {processes[worker_id].exitcode}")
+                finished.add(worker_id)
+    return results, pending
+
+
+def run_sharded(specs, workers=None, concurrency=4, timeout=90, headless=True,
+                network_profile="scrape-minimal", save=True, on_result=None, store_dir=None,
+                selector_cache_path=None):
+    """
+    Shard a batch of searches across worker processes.
+
+    Each of the `workers` processes (default: CPU count) owns its own browser
+    and a pool of `concurrency` contexts. Results stream back to this process
+    as they finish and are merged in spec order. Searches of a worker that
+    crashes are reported with an error instead of being lost. With store_dir,
+    every worker appends the scraped listings to the ResultsStore there.
+    selector_cache_path is the selector cache file the workers use (default:
+    SelectorCache.default_path).
+    """
+    if not specs:
+        return []
+
+    workers = max(1, min(workers or multiprocessing.cpu_count(), len(specs)))
+    indexed = list(enumerate(specs))
+    shards = [indexed[i::workers] for i in range(workers)]
+
+    # Playwright isn't fork-safe, so always start clean interpreter processes
+    mp = multiprocessing.get_context("spawn")
+    results_queue = mp.Queue()
+    processes = []
+    for worker_id, shard in enumerate(shards):
+        process = mp.Process(target=_shard_worker, name=f"search-shard-{worker_id}",
+                             args=(worker_id, shard, results_queue, concurrency, timeout, headless,
+                                   network_profile, store_dir, selector_cache_path or SelectorCache.default_path))
+        process.start()
+        processes.append(process)
+
+    try:
+        results, pending = _collect_shard_results(processes, results_queue, shards, on_result)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        results_queue.close()
+
+    for worker_id, indices in pending.items():
+        for index in indices:
+            results[index] = {
+                "spec": asdict(specs[index]),
+                "error": f"Worker {worker_id} crashed before finishing this search"
+            }
+
+    if save:
+        save_batch_results(results)
+
+    return results
+
+
+def load_specs(path):
+    """Load search specs from a JSON file containing a list of objects."""
+    with open(path, encoding="utf-8") as f:
+        return [SearchSpec(**item) for item in json.load(f)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of Airbnb searches concurrently.")
+    parser.add_argument("specs", help="JSON file with a list of search specs")
+    parser.add_argument("--concurrency", type=int, default=4, help="Number of browser contexts (per process)")
+    parser.add_argument("--timeout", type=float, default=90, help="Timeout per search in seconds")
+    parser.add_argument("--headed", action="store_true", help="Show the browser")
+    parser.add_argument("--network-profile", default="scrape-minimal",
+                        help="Request blocking profile: scrape-minimal, visual or full")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Shard the searches across this many processes (0 = single process)")
+    parser.add_argument("--store", default=None,
+                        help="Append every scraped listing to the results store in this directory")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time page-object steps and Playwright calls (single process only) and print a summary")
+    parser.add_argument("--selector-cache", default=DEFAULT_CACHE_PATH,
+                        help="JSON file remembering which selectors worked")
+    parser.add_argument("--screenshots", choices=list(SCREENSHOT_POLICIES), default="on-error",
+                        help="off, on-error or ring (keep the last frames in memory, write them only for failed "
+                             "searches; single process only)")
+    args = parser.parse_args()
+    SelectorCache.set_default_path(args.selector_cache)
+    if args.instrument:
+        set_instrumentation(Instrumentation(enabled=True))
+    set_screenshot_manager(ScreenshotManager(args.screenshots))
+
+    specs = load_specs(args.specs)
+    started = time.perf_counter()
+    if args.workers:
+        results = run_sharded(specs, args.workers, args.concurrency, args.timeout, headless=not args.headed,
+                              network_profile=args.network_profile, store_dir=args.store)
+    else:
+        store = ResultsStore(args.store) if args.store else None
+        results = asyncio.run(run_searches(specs, args.concurrency, args.timeout, headless=not args.headed,
+                                           network_profile=args.network_profile, store=store))
+    failed = sum(1 for result in results if "error" in result)
+    print(f"Ran {len(results)} searches ({failed} failed) in {time.perf_counter() - started:.1f}s")
+    if args.instrument:
+        get_instrumentation().print_summary()
+        path = get_instrumentation().write_log("search_runner")
+        if path:
+            print(f"Instrumentation log written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import json
+import os
+import time
+
+DEFAULT_CACHE_PATH = "selector_cache.json"
+
+
+class SelectorCache:
+    """
+    Remember which selectors found something, per domain and selector group
+    (e.g. "card", "name", "price"), and reorder candidate lists so the known
+    winners are tried first.
+
+    Every attempt records a hit or miss and its latency. Counts decay with a
+    half-life, so a selector that stopped working (or started working) after a
+    site update is re-ranked within a few runs. The statistics are kept in a
+    JSON file so later runs start warm.
+
+    Args:
+        path: JSON file the statistics are loaded from and saved to (None keeps them in memory)
+        half_life_hours: Time after which old hits and misses count half as much
+        autosave_seconds: Minimum time between automatic saves from record()
+    """
+
+    # Entries whose decayed attempt count falls below this are dropped on save
+    MIN_ATTEMPTS = 0.05
+
+    _shared = {}
+    # The file shared() uses when no path is given (see set_default_path)
+    default_path = DEFAULT_CACHE_PATH
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, half_life_hours=72, autosave_seconds=30):
+        self.path = path
+        self.half_life = half_life_hours * 3600
+        self.autosave_seconds = autosave_seconds
+        self.stats = {}
+        self._dirty = False
+        self._last_save = time.time()
+        self.load()
+
+    @classmethod
+    def set_default_path(cls, path):
+        """Make path the file of the cache page objects share by default (e.g. from --selector-cache)."""
+        cls.default_path = path
+
+    @classmethod
+    def shared(cls, path=None):
+        """Return the cache for path (default: default_path) shared by every page object in this process."""
+        path = path or cls.default_path
+        if path not in cls._shared:
+            cls._shared[path] = cls(path)
+        return cls._shared[path]
+
+    def load(self):
+        """Load the statistics from disk (an unreadable file starts an empty cache)."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stats = json.load(f)
+        except Exception as e:
+            print(f"Could not load selector cache {self.path}: {e}")
+            self.stats = {}
+
+    def save(self):
+        """Write the statistics to disk, dropping entries that have decayed away."""
+        if not self.path or not self._dirty:
+            return
+        now = time.time()
+        for domain, groups in list(self.stats.items()):
+            for group, entries in list(groups.items()):
+                for selector in list(entries):
+                    if self._decayed(entries[selector], now)["attempts"] < self.MIN_ATTEMPTS:
+                        del entries[selector]
+                if not entries:
+                    del groups[group]
+            if not groups:
+                del self.stats[domain]
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a half-written cache
+            temp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.stats, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.path)
+            self._dirty = False
+            self._last_save = now
+        except Exception as e:
+            print(f"Could not save selector cache {self.path}: {e}")
+
+    def _decayed(self, entry, now):
+        """Apply the decay since the entry was last updated, in place."""
+        age = now - entry["updated"]
+        if age > 0 and self.half_life:
+            factor = 0.5 ** (age / self.half_life)
+            entry["hits"] *= factor
+            entry["attempts"] *= factor
+            entry["updated"] = now
+        return entry
+
+    def _entries(self, domain, group):
+        return self.stats.setdefault(domain or "", {}).setdefault(group, {})
+
+    def record(self, domain, group, selector, hit, latency_ms):
+        """Record one attempt of selector (hit is whether it found what it was looking for)."""
+        now = time.time()
+        entries = self._entries(domain, group)
+        entry = entries.get(selector)
+        if entry is None:
+            entry = entries[selector] = {"hits": 0.0, "attempts": 0.0, "latency_ms": round(latency_ms, 3), "updated": now}
+        else:
+            self._decayed(entry, now)
+            # Exponential moving average, so the latency follows the site's current behavior
+            entry["latency_ms"] = round(0.8 * entry["latency_ms"] + 0.2 * latency_ms, 3)
+        entry["attempts"] += 1
+        if hit:
+            entry["hits"] += 1
+        self._dirty = True
+        if self.autosave_seconds is not None and now - self._last_save >= self.autosave_seconds:
+            self.save()
+
+    def hit_rate(self, domain, group, selector):
+        """The smoothed, decayed hit rate of a selector; 0.5 for selectors never tried."""
+        entry = self._entries(domain, group).get(selector)
+        if entry is None:
+            return 0.5
+        entry = self._decayed(entry, time.time())
+        return (entry["hits"] + 0.5) / (entry["attempts"] + 1)
+
+    def order(self, domain, group, selectors):
+        """
+        Return selectors reordered by hit rate (highest first). Selectors with the
+        same hit rate keep their original priority, so a fast generic selector never
+        overtakes a more specific one that works as well. Untried selectors rank
+        between proven winners and known misses.
+        """
+        # Rounded, so tiny decay differences don't reorder selectors with the same record;
+        # sorted() is stable, so ties stay in the given order
+        return sorted(selectors, key=lambda selector: -round(self.hit_rate(domain, group, selector), 3))
+
+    def summary(self, domain, group):
+        """Return {selector: (hit rate, attempts, latency ms)} for one domain and group."""
+        return {
+            selector: (round(self.hit_rate(domain, group, selector), 3), round(entry["attempts"], 2), entry["latency_ms"])
+            for selector, entry in self._entries(domain, group).items()
+        }
@@ -1,9 +1,18 @@
+from datetime import date, timedelta
+
 import pytest
 from pages.home_page import HomePage
 from pages.search_results_page import SearchResultsPage
 from pages.listing_page import ListingPage
 
-@pytest.mark.asyncio
+
+def stay_dates(days_ahead, nights):
+    """Check-in and check-out dates (YYYY-MM-DD) of a stay starting days_ahead days from today."""
+    checkin = date.today() + timedelta(days=days_ahead)
+    return checkin.isoformat(), (checkin + timedelta(days=nights)).isoformat()
+
+
+@pytest.mark.asyncio(loop_scope="session")
 async def test_airbnb_search_highest_and_cheapest(page):
     print("Launching home page...")
     home = HomePage(page)
@@ -13,11 +22,11 @@ async def test_airbnb_search_highest_and_cheapest(page):
     await home.go_to("https://www.airbnb.com/?locale=en")
 
     print("Searching for apartment...")
-    await home.search_apartment("Tel Aviv", "2025-05-20", "2025-05-25", adults=2)
+    await home.search_apartment("Tel Aviv", *stay_dates(30, 5), adults=2)
 
     # Wait for results to load
     print("Waiting for search results to load...")
-    await page.wait_for_timeout(5000)
+    await results.wait_for_results()
 
     # Analyze the search results
     print("Analyzing search results...")
@@ -26,14 +35,23 @@ async def test_airbnb_search_highest_and_cheapest(page):
     listings = await results.get_all_listings()
     print(f"Found {len(listings)} listings")
 
+    # Bulk extraction stays a single evaluate however many cards there are
+    # (checked with --enforce-round-trip-budgets)
+    results.invalidate_snapshot()
+    with results.round_trip_budget(5, "extract listing cards"):
+        await results.extract_listing_cards()
+
     # Getting highest-rated, cheapest, and saving results - all in one step
     print("Saving analysis results...")
     highest, cheapest = await results.save_analysis_results()
 
+    home.print_wait_report()
+    results.print_wait_report()
+
     # Test passes regardless of whether we found actual listings or used sample data
     print("Test completed successfully")
 
-@pytest.mark.asyncio
+@pytest.mark.asyncio(loop_scope="session")
 async def test_airbnb_search_family_options(page):
     print("Launching home page...")
     home = HomePage(page)
@@ -43,11 +61,11 @@ async def test_airbnb_search_family_options(page):
     await home.go_to("https://www.airbnb.com/?locale=en")
 
     print("Searching for family apartment...")
-    await home.search_apartment("Tel Aviv", "2025-06-01", "2025-06-07", adults=2, children=1)
+    await home.search_apartment("Tel Aviv", *stay_dates(45, 6), adults=2, children=1)
 
     # Wait for results to load
     print("Waiting for search results to load...")
-    await page.wait_for_timeout(5000)
+    await results.wait_for_results()
 
     # Analyze the search results
     print("Analyzing search results...")
@@ -60,5 +78,22 @@ async def test_airbnb_search_family_options(page):
     print("Saving family-friendly analysis results...")
     family_friendly, best_value = await results.save_family_analysis_results()
 
+    home.print_wait_report()
+    results.print_wait_report()
+
     # Test passes regardless of whether we found actual listings or used sample data
-    print("Test completed successfully")
\ No newline at end of file
+    print("Test completed successfully")
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_airbnb_search_form_ui(page):
+    """Form-regression test: drive the search form instead of navigating to the results URL."""
+    home = HomePage(page)
+    results = SearchResultsPage(page)
+
+    await home.go_to("https://www.airbnb.com/?locale=en")
+    await home.search_apartment("Tel Aviv", *stay_dates(30, 5), adults=2, mode="ui")
+
+    await results.wait_for_results()
+    home.print_wait_report()
+
+    assert "/s/" in page.url or "search" in page.url.lower()
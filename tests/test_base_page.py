@@ -0,0 +1,23 @@
+import pytest
+from pages.base_page import BasePage
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+PAGE = "<!DOCTYPE html><html><body><button id='search'>Search</button></body></html>"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_response_timeout_returns_false(page):
+    await page.set_content(PAGE)
+    base = BasePage(page, {"response": 300})
+    # The click works, but no search response ever comes
+    assert await base.run_and_wait_for_response("search", lambda: page.click("#search")) is False
+    assert base.wait_report[-1]["outcome"] == "timeout"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_action_timeout_is_raised(page):
+    await page.set_content(PAGE)
+    base = BasePage(page, {"response": 5000})
+    with pytest.raises(PlaywrightTimeoutError):
+        await base.run_and_wait_for_response("search", lambda: page.click("#missing", timeout=300))
+    assert base.wait_report[-1]["outcome"] == "error"
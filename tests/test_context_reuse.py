@@ -0,0 +1,49 @@
+"""
+Checks that --reuse-context gives every test a clean context. Run with
+    pytest tests/test_context_reuse.py --reuse-context
+(without the flag every test gets a fresh context, so they pass trivially).
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b"<!DOCTYPE html><html><body>storage test</body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def origin():
+    """A local origin shared by the tests of this module, so they see the same storage."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_write_storage(page, origin):
+    await page.goto(origin)
+    await page.evaluate("() => { localStorage.setItem('previous_test', '1'); sessionStorage.setItem('previous_test', '1'); }")
+    assert await page.evaluate("() => localStorage.getItem('previous_test')") == "1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_storage_cleared_for_next_test(page, origin):
+    await page.goto(origin)
+    assert await page.evaluate("() => localStorage.getItem('previous_test')") is None
+    assert await page.evaluate("() => sessionStorage.getItem('previous_test')") is None
+    assert await page.context.cookies() == []
@@ -0,0 +1,102 @@
+"""
+Crawl multi-page results served from a local server: each page carries its listings
+and pagination info in embedded page state, like the server-rendered Airbnb pages.
+"""
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from pages.search_results_page import SearchResultsPage
+from selector_cache import SelectorCache
+
+# path -> cursor (None for the first page) -> (listing ids, paginationInfo);
+# cursors without a page ("broken") drop the connection, so loading them fails
+SITES = {
+    "/s/All-Cursors/homes": {
+        None: ([1, 2], {"pageCursors": ["first", "p2", "broken", "p4"]}),
+        "p2": ([3, 4], {"pageCursors": ["first", "p2", "broken", "p4"]}),
+        # Listing 2 shows up again on a later page
+        "p4": ([2, 5], {"pageCursors": ["first", "p2", "broken", "p4"]}),
+    },
+    "/s/Next-Cursor/homes": {
+        None: ([11, 12], {"nextPageCursor": "n2"}),
+        "n2": ([13], {"nextPageCursor": "n3"}),
+        "n3": ([14], {"nextPageCursor": None}),
+    },
+}
+
+
+def render_page(listing_ids, pagination):
+    results = [{
+        "listing": {"id": base64.b64encode(f"DemandStayListing:{listing_id}".encode()).decode(),
+                    "name": f"Apartment {listing_id}"},
+        "avgRatingLocalized": "4.8 (20)",
+        "structuredDisplayPrice": {"primaryLine": {"price": f"₪{500 + listing_id}", "qualifier": "night"}}
+    } for listing_id in listing_ids]
+    state = {"staysSearch": {"results": {"searchResults": results, "paginationInfo": pagination}}}
+    cards = "".join(f'<div itemprop="itemListElement"><a href="/rooms/{listing_id}">Apartment {listing_id}</a></div>'
+                    for listing_id in listing_ids)
+    return (f'<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>{cards}'
+            f'<script id="data-deferred-state-0" type="application/json">{json.dumps(state)}</script>'
+            f'</body></html>').encode("utf-8")
+
+
+class _ResultsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        cursor = parse_qs(url.query).get("cursor", [None])[0]
+        page = SITES.get(url.path, {}).get(cursor)
+        if page is None:
+            self.close_connection = True  # no response at all: the page fails to load
+            return
+        body = render_page(*page)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def results_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ResultsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+async def crawl(page, url):
+    results = SearchResultsPage(page, {"response": 2000}, SelectorCache(path=None))
+    await page.goto(url)
+    await results.wait_for_results()
+    return [card async for card in results.iter_listings(all_pages=True)]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_crawl_all_page_cursors_skips_failed_page(page, results_server):
+    cards = await crawl(page, results_server + "/s/All-Cursors/homes?adults=2")
+    # The broken page is skipped, the pages around it are kept and duplicates dropped
+    assert [card["listing_id"] for card in cards] == ["1", "2", "3", "4", "5"]
+    assert cards[0]["url"] == results_server + "/rooms/1"
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_crawl_from_a_later_page_continues_after_it(page, results_server):
+    cards = await crawl(page, results_server + "/s/All-Cursors/homes?adults=2&cursor=p2")
+    # Page 2 and the pages after it; the first page isn't fetched again
+    assert [card["listing_id"] for card in cards] == ["3", "4", "2", "5"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_crawl_follows_next_page_cursors(page, results_server):
+    cards = await crawl(page, results_server + "/s/Next-Cursor/homes?adults=2")
+    assert [card["listing_id"] for card in cards] == ["11", "12", "13", "14"]
@@ -0,0 +1,17 @@
+import pytest
+from file_names import safe_filename
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("tests/test_airbnb.py::test_search[Tel Aviv]", "tests_test_airbnb.py_test_search_Tel_Aviv"),
+    ("search_page_loaded", "search_page_loaded"),
+    ("/s/Tel-Aviv/homes", "s_Tel-Aviv_homes"),
+    ("..", ""),
+    (".hidden", "hidden"),
+])
+def test_safe_filename(name, expected):
+    assert safe_filename(name) == expected
+
+
+def test_safe_filename_default():
+    assert safe_filename("/", "root") == "root"
@@ -0,0 +1,47 @@
+import pytest
+from price_parser import parse_amount, parse_price, price_value
+
+# (price text, nights from the search dates, expected (amount, original_amount, currency, per_night, total, nights))
+PRICE_CORPUS = [
+    ("₪750 night", None, (750.0, None, "ILS", 750.0, None, None)),
+    ("₪750 night", 5, (750.0, None, "ILS", 750.0, 3750.0, 5)),
+    ("₪650 per night", None, (650.0, None, "ILS", 650.0, None, None)),
+    ("$85 / night", 3, (85.0, None, "USD", 85.0, 255.0, 3)),
+    ("₪1,250 total before taxes", None, (1250.0, None, "ILS", None, 1250.0, None)),
+    ("₪1,250 total before taxes", 5, (250.0, None, "ILS", 250.0, 1250.0, 5)),
+    ("1,250 ILS total", 2, (625.0, None, "ILS", 625.0, 1250.0, 2)),
+    ("₪900 ₪750 night", None, (750.0, 900.0, "ILS", 750.0, None, None)),
+    ("₪900 ₪750 night", 4, (750.0, 900.0, "ILS", 750.0, 3000.0, 4)),
+    ("Was ₪900, now ₪750", None, (750.0, 900.0, "ILS", 750.0, None, None)),
+    ("Was ₪900 now ₪750 night", 2, (750.0, 900.0, "ILS", 750.0, 1500.0, 2)),
+    ("Was ₪3,200, now ₪2,880 for 4 nights", None, (720.0, 3200.0, "ILS", 720.0, 2880.0, 4)),
+    ("$120 $150 night", None, (150.0, None, "USD", 150.0, None, None)),
+    ("₪2,450 for 5 nights", None, (490.0, None, "ILS", 490.0, 2450.0, 5)),
+    ("₪400 for 1 night", None, (400.0, None, "ILS", 400.0, 400.0, 1)),
+    ("₪3,200 ₪2,880 for 4 nights", None, (720.0, 3200.0, "ILS", 720.0, 2880.0, 4)),
+    ("₪750 night · ₪3,750 total", None, (750.0, None, "ILS", 750.0, 3750.0, None)),
+    ("$1,234.56", None, (1234.56, None, "USD", 1234.56, None, None)),
+    ("€1.234,56 night", None, (1234.56, None, "EUR", 1234.56, None, None)),
+    ("₪1 250 night", None, (1250.0, None, "ILS", 1250.0, None, None)),
+    ("₪99.95", None, (99.95, None, "ILS", 99.95, None, None)),
+    ("Price not found", None, (None, None, None, None, None, None)),
+    ("", None, (None, None, None, None, None, None)),
+]
+
+
+@pytest.mark.parametrize("text, nights, expected", PRICE_CORPUS)
+def test_parse_price_corpus(text, nights, expected):
+    assert tuple(parse_price(text, nights)) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1,250", 1250.0), ("1.250.000", 1250000.0), ("12,5", 12.5), ("99.95", 99.95), ("1.234,56", 1234.56),
+])
+def test_parse_amount_separators(text, expected):
+    assert parse_amount(text) == expected
+
+
+def test_price_value_prefers_per_night():
+    assert price_value("₪2,450 for 5 nights") == 490.0
+    assert price_value("₪1,250 total before taxes") == 1250.0
+    assert price_value("Price not found") is None
@@ -0,0 +1,32 @@
+import asyncio
+import json
+
+from replay import ReplayFixture
+
+
+class FakePage:
+    def __init__(self, url):
+        self.url = url
+
+    async def content(self):
+        await asyncio.sleep(0)
+        return f"<html><body>{self.url}</body></html>"
+
+
+def test_concurrent_snapshots_write_a_complete_manifest(tmp_path):
+    fixture = ReplayFixture("tests/test_x.py::test_search", "record", str(tmp_path))
+
+    async def record():
+        pages = [FakePage(f"http://127.0.0.1/s/Tel-Aviv/homes?cursor=c{index}") for index in range(50)]
+        await asyncio.gather(*[fixture.snapshot(page) for page in pages])
+
+    asyncio.run(record())
+    with open(fixture.manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest == fixture.snapshots
+    assert len(manifest) == 50
+
+    replayed = ReplayFixture("tests/test_x.py::test_search", "snapshot", str(tmp_path))
+    replayed.load_manifest()
+    with open(replayed.snapshot_path("http://127.0.0.1/s/Tel-Aviv/homes?cursor=c7"), encoding="utf-8") as f:
+        assert "cursor=c7" in f.read()
@@ -0,0 +1,101 @@
+import os
+import re
+from datetime import date, timedelta
+
+import pytest
+import results_store
+from results_store import ResultsStore
+
+SEARCH = {"location": "Tel Aviv", "adults": 2}
+
+
+def listing(name, price="₪750 night"):
+    return {"name": name, "price": price, "rating": 4.8}
+
+
+def write_day(store, day, records):
+    """Write records as a part file of a past day (append() always writes today's)."""
+    os.makedirs(store.partition_dir(day), exist_ok=True)
+    path = os.path.join(store.partition_dir(day), "part-1-old-0001.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f'{{"scraped_at": "{day}T10:00:00", "name": "{name}", "location": "{location}"}}\n'
+                     for name, location in records)
+
+
+def test_append_writes_daily_partitions(tmp_path):
+    with ResultsStore(str(tmp_path), batch_size=2) as store:
+        assert store.append([listing("a"), listing("b"), listing("c")], SEARCH) == 3
+
+    today = date.today().isoformat()
+    assert os.listdir(tmp_path) == [f"date={today}"]
+    assert store.days() == [today]
+    records = store.load()
+    assert [record["name"] for record in records] == ["a", "b", "c"]
+    assert records[0]["location"] == "Tel Aviv"
+    assert records[0]["run_id"] == store.run_id
+    assert records[0]["scraped_at"].startswith(today)
+
+
+def test_every_store_writes_its_own_part_files(tmp_path):
+    first, second = ResultsStore(str(tmp_path)), ResultsStore(str(tmp_path))
+    first.append([listing("first")])
+    second.append([listing("second")])
+    first.close()
+    second.close()
+
+    parts = sorted(os.listdir(first.partition_dir(date.today().isoformat())))
+    assert len(parts) == 2
+    for part, store in zip(parts, sorted([first, second], key=lambda s: s.run_id)):
+        assert re.fullmatch(rf"part-{os.getpid()}-{store.run_id}-0001\.jsonl", part)
+    assert sorted(record["name"] for record in first.load()) == ["first", "second"]
+
+
+def test_new_part_once_the_current_one_is_full(tmp_path):
+    store = ResultsStore(str(tmp_path), batch_size=1, max_part_mb=0)
+    store.append([listing("a"), listing("b")])
+    parts = sorted(os.listdir(store.partition_dir(date.today().isoformat())))
+    assert [part[-10:] for part in parts] == ["0001.jsonl", "0002.jsonl"]
+
+
+def test_load_days_columns_and_filters(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    today = date.today()
+    write_day(store, (today - timedelta(days=40)).isoformat(), [("old", "Tel Aviv")])
+    write_day(store, (today - timedelta(days=2)).isoformat(), [("recent", "Tel Aviv"), ("other", "Haifa")])
+    write_day(store, today.isoformat(), [("today", "Tel Aviv")])
+
+    assert [record["name"] for record in store.load(today - timedelta(days=41), today - timedelta(days=3))] == ["old"]
+    assert store.load_last_days(30, location="Tel Aviv", columns=["name"]) == [{"name": "recent"}, {"name": "today"}]
+    assert store.load(location="Haifa", columns=["name", "missing"]) == [{"name": "other", "missing": None}]
+
+
+def test_load_skips_a_torn_last_line(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append([listing("a")])
+    store.close()
+    directory = store.partition_dir(date.today().isoformat())
+    part = os.path.join(directory, os.listdir(directory)[0])
+    with open(part, "a", encoding="utf-8") as f:
+        f.write('{"name": "torn')
+    assert [record["name"] for record in store.load()] == ["a"]
+
+
+def test_compacted_day_loads_the_same_records(tmp_path):
+    pytest.importorskip("pyarrow")
+    store = ResultsStore(str(tmp_path))
+    day = (date.today() - timedelta(days=1)).isoformat()
+    write_day(store, day, [("a", "Tel Aviv"), ("b", "Haifa")])
+    before = store.load(day, day)
+    path = store.compact(day)
+    assert os.listdir(store.partition_dir(day)) == [os.path.basename(path)]
+    assert store.load(day, day) == before
+
+
+def test_load_parquet_without_pyarrow_fails(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "pyarrow", None)
+    store = ResultsStore(str(tmp_path))
+    day = date.today().isoformat()
+    os.makedirs(store.partition_dir(day))
+    open(os.path.join(store.partition_dir(day), "compacted-1.parquet"), "wb").close()
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        store.load()
@@ -0,0 +1,100 @@
+import base64
+import json
+
+import pytest
+from search_api import (build_page_url, find_next_page_cursor, find_pagination_info, parse_embedded_state,
+                        parse_search_payload, parse_search_result)
+
+
+def global_id(listing_id):
+    return base64.b64encode(f"DemandStayListing:{listing_id}".encode()).decode().rstrip("=")
+
+
+def search_result(listing_id, name="Sea view loft", price="₪750", qualifier="night",
+                  rating_label="4.92 (128)"):
+    return {
+        "listing": {"id": global_id(listing_id), "name": name},
+        "avgRatingLocalized": rating_label,
+        "structuredDisplayPrice": {"primaryLine": {"price": price, "qualifier": qualifier}}
+    }
+
+
+def payload(results, pagination=None):
+    section = {"searchResults": results}
+    if pagination is not None:
+        section["paginationInfo"] = pagination
+    return {"data": {"presentation": {"staysSearch": {"results": section}}}}
+
+
+def test_parse_search_result_fields():
+    listing = parse_search_result(search_result(12345), origin="https://www.airbnb.co.il")
+    assert listing == {
+        "name": "Sea view loft",
+        "price": "₪750 night",
+        "rating": 4.92,
+        "review_count": 128,
+        "listing_id": "12345",
+        "url": "https://www.airbnb.co.il/rooms/12345"
+    }
+
+
+@pytest.mark.parametrize("result, expected", [
+    ({"avgRatingA11yLabel": "4,87 out of 5 average rating, 1,024 reviews"}, (4.87, 1024)),
+    ({"avgRatingLocalized": "New"}, (None, None)),
+    ({"listing": {"avgRating": 4.5, "reviewsCount": 12}}, (4.5, 12)),
+])
+def test_parse_search_result_ratings(result, expected):
+    listing = parse_search_result(dict(result, listing=dict(result.get("listing", {}), id="7")))
+    assert (listing["rating"], listing["review_count"]) == expected
+
+
+def test_parse_search_result_prefers_discounted_price_and_plain_ids():
+    result = search_result(1)
+    result["structuredDisplayPrice"]["primaryLine"]["discountedPrice"] = "₪600"
+    result["listing"]["id"] = "98765"
+    listing = parse_search_result(result)
+    assert listing["price"] == "₪600 night"
+    assert listing["listing_id"] == "98765"
+
+
+def test_parse_search_result_without_id():
+    listing = parse_search_result({"listing": {"id": "not base64!"}, "title": "Untitled"})
+    assert listing["listing_id"] is None
+    assert listing["url"] is None
+    assert listing["name"] == "Untitled"
+
+
+def test_parse_search_payload_keeps_order_and_drops_duplicates():
+    data = payload([search_result(1), search_result(2)])
+    # The map section repeats listings of the list section
+    data["data"]["presentation"]["staysSearch"]["mapResults"] = {"searchResults": [search_result(2)]}
+    assert [listing["listing_id"] for listing in parse_search_payload(data)] == ["1", "2"]
+
+
+def test_find_pagination_info():
+    data = payload([], {"nextPageCursor": "c2", "pageCursors": ["c1", "c2", "c3"]})
+    assert find_pagination_info(data) == {"next_page_cursor": "c2", "page_cursors": ["c1", "c2", "c3"]}
+    assert find_next_page_cursor(data) == "c2"
+    assert find_pagination_info(payload([])) == {"next_page_cursor": None, "page_cursors": None}
+
+
+def test_build_page_url_replaces_cursor():
+    url = build_page_url("https://www.airbnb.com/s/Tel-Aviv/homes?adults=2&cursor=old&pagination_search=true", "new")
+    assert url == "https://www.airbnb.com/s/Tel-Aviv/homes?adults=2&pagination_search=true&cursor=new"
+
+
+def test_parse_embedded_state_merges_scripts():
+    scripts = [
+        "not json",
+        json.dumps({"unrelated": True}),
+        json.dumps(payload([search_result(1), search_result(2)], {"nextPageCursor": "c2", "pageCursors": None})),
+        json.dumps(payload([search_result(2), search_result(3)], {"nextPageCursor": "other", "pageCursors": None})),
+    ]
+    listings, pagination = parse_embedded_state(scripts)
+    assert [listing["listing_id"] for listing in listings] == ["1", "2", "3"]
+    # The pagination info comes from the first script with listings
+    assert pagination == {"next_page_cursor": "c2", "page_cursors": None}
+
+
+def test_parse_embedded_state_without_listings():
+    assert parse_embedded_state([]) == ([], {"next_page_cursor": None, "page_cursors": None})
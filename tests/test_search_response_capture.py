@@ -0,0 +1,82 @@
+"""
+Listings captured from search API responses stay with the URL they belong to,
+including when the page updates its URL with pushState after the response.
+"""
+import base64
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+from pages.search_results_page import SearchResultsPage
+from selector_cache import SelectorCache
+
+# Fetches the search results, then moves to page 2 with pushState, like a client-side search update
+SEARCH_PAGE = b'''<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>
+<div itemprop="itemListElement"><a href="/rooms/99">DOM apartment</a></div>
+<script>
+fetch("/api/v3/StaysSearch").then(response => response.json())
+    .then(() => history.pushState({}, "", location.pathname + "?cursor=p2"));
+</script></body></html>'''
+
+OTHER_PAGE = b'''<!DOCTYPE html><html><head><meta charset="utf-8"></head><body>
+<div itemprop="itemListElement"><a href="/rooms/77">Other apartment</a></div></body></html>'''
+
+
+def search_payload(listing_ids):
+    results = [{
+        "listing": {"id": base64.b64encode(f"DemandStayListing:{listing_id}".encode()).decode(),
+                    "name": f"Apartment {listing_id}"},
+        "structuredDisplayPrice": {"primaryLine": {"price": "₪600", "qualifier": "night"}}
+    } for listing_id in listing_ids]
+    return json.dumps({"data": {"staysSearch": {"results": {"searchResults": results}}}}).encode("utf-8")
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/api/v3/StaysSearch":
+            body, content_type = search_payload([1, 2]), "application/json"
+        elif path == "/s/Tel-Aviv/homes":
+            body, content_type = SEARCH_PAGE, "text/html; charset=utf-8"
+        else:
+            body, content_type = OTHER_PAGE, "text/html; charset=utf-8"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def search_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SearchHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_listings_survive_the_push_state_url_update(page, search_server):
+    results = SearchResultsPage(page, {"response": 2000}, SelectorCache(path=None))
+    await page.goto(search_server + "/s/Tel-Aviv/homes")
+    await page.wait_for_url("**cursor=p2")
+    cards = await results.get_listing_snapshot()
+    assert [card["listing_id"] for card in cards] == ["1", "2"]
+
+
+@pytest.mark.asyncio(loop_scope="session")
+async def test_listings_are_not_used_on_another_page(page, search_server):
+    results = SearchResultsPage(page, {"response": 2000}, SelectorCache(path=None))
+    await page.goto(search_server + "/s/Tel-Aviv/homes")
+    await page.wait_for_url("**cursor=p2")
+    await page.goto(search_server + "/rooms-list")
+    cards = await results.get_listing_snapshot()
+    assert [card["listing_id"] for card in cards] == ["77"]
@@ -0,0 +1,74 @@
+import multiprocessing
+import queue
+import time
+
+from search_runner import _collect_shard_results
+
+
+def report(results_queue, worker_id, indices, hang_after=None):
+    """A stand-in shard worker: report each index, then either finish or hang (to be killed)."""
+    for index in indices:
+        results_queue.put(("result", index, {"index": index}))
+        if index == hang_after:
+            time.sleep(60)
+    results_queue.put(("done", worker_id, None))
+
+
+class ExitedProcess:
+    exitcode = 0
+
+    def is_alive(self):
+        return False
+
+
+class LateQueue:
+    """A queue whose messages only show up after the first poll timed out, like a pipe still being fed."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.polled = False
+
+    def get(self, timeout=None):
+        if not self.polled:
+            self.polled = True
+            raise queue.Empty
+        return self.get_nowait()
+
+    def get_nowait(self):
+        if not self.messages:
+            raise queue.Empty
+        return self.messages.pop(0)
+
+
+def test_exited_worker_messages_are_drained_before_it_counts_as_crashed():
+    messages = [("result", 0, {"index": 0}), ("result", 1, {"index": 1}), ("done", 0, None)]
+    results, pending = _collect_shard_results([ExitedProcess()], LateQueue(messages), [[(0, None), (1, None)]],
+                                              poll_timeout=0)
+    assert results == [{"index": 0}, {"index": 1}]
+    assert pending == {0: set()}
+
+
+def test_killed_worker_keeps_reported_results():
+    mp = multiprocessing.get_context("spawn")
+    results_queue = mp.Queue()
+    shards = [[(0, None), (1, None)], [(2, None), (3, None)]]
+    # Worker 0 hangs after its first search and is killed mid-shard
+    processes = [mp.Process(target=report, args=(results_queue, 0, [0, 1], 0)),
+                 mp.Process(target=report, args=(results_queue, 1, [2, 3]))]
+    for process in processes:
+        process.start()
+
+    def kill_hung_worker(result):
+        if result["index"] == 0:
+            processes[0].kill()
+
+    try:
+        results, pending = _collect_shard_results(processes, results_queue, shards, kill_hung_worker,
+                                                  poll_timeout=0.2)
+    finally:
+        for process in processes:
+            process.join(10)
+        results_queue.close()
+
+    assert results == [{"index": 0}, None, {"index": 2}, {"index": 3}]
+    assert pending == {0: {1}, 1: set()}
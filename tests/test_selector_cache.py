@@ -0,0 +1,36 @@
+from selector_cache import SelectorCache
+
+SPECIFIC = 'div[itemprop="itemListElement"]'
+GENERIC = 'div[id^="card-"]'
+UNUSED = 'div[data-testid="listing-card"]'
+
+
+def test_order_prefers_hit_rate():
+    cache = SelectorCache(path=None)
+    for _ in range(3):
+        cache.record("www.airbnb.com", "card", SPECIFIC, False, 1.0)
+        cache.record("www.airbnb.com", "card", GENERIC, True, 1.0)
+    assert cache.order("www.airbnb.com", "card", [SPECIFIC, UNUSED, GENERIC]) == [GENERIC, UNUSED, SPECIFIC]
+
+
+def test_order_breaks_ties_by_priority_not_latency():
+    cache = SelectorCache(path=None)
+    for _ in range(5):
+        cache.record("www.airbnb.com", "card", SPECIFIC, True, 40.0)
+        cache.record("www.airbnb.com", "card", GENERIC, True, 0.5)
+    assert cache.order("www.airbnb.com", "card", [SPECIFIC, GENERIC]) == [SPECIFIC, GENERIC]
+
+
+def test_order_is_per_domain_and_group():
+    cache = SelectorCache(path=None)
+    cache.record("www.airbnb.com", "card", GENERIC, True, 1.0)
+    assert cache.order("www.airbnb.co.il", "card", [SPECIFIC, GENERIC]) == [SPECIFIC, GENERIC]
+    assert cache.order("www.airbnb.com", "price", [SPECIFIC, GENERIC]) == [SPECIFIC, GENERIC]
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "cache" / "selectors.json")
+    cache = SelectorCache(path=path)
+    cache.record("www.airbnb.com", "card", GENERIC, True, 1.0)
+    cache.save()
+    assert SelectorCache(path=path).order("www.airbnb.com", "card", [SPECIFIC, GENERIC]) == [GENERIC, SPECIFIC]
@@ -0,0 +1,91 @@
+import os
+import random
+from datetime import datetime
+
+from file_names import safe_filename
+
+# What each policy records; "retain" says which traces are written to disk
+TRACING_POLICIES = {
+    "off": None,
+    "on-retry": {"screenshots": True, "snapshots": True, "sources": False, "retain": "failed"},
+    "on-failure": {"screenshots": True, "snapshots": True, "sources": False, "retain": "failed"},
+    "sampled": {"screenshots": True, "snapshots": True, "sources": True, "retain": "always"},
+    "full": {"screenshots": True, "snapshots": True, "sources": True, "retain": "always"},
+}
+
+
+class TracePolicy:
+    """
+    Decide which tests are traced, where their traces go and how many are kept.
+
+    Args:
+        policy: One of TRACING_POLICIES ("off", "on-retry", "on-failure", "sampled", "full")
+        trace_dir: Directory for retained traces
+        sample_rate: Fraction of tests traced under the "sampled" policy
+        max_total_mb: Prune the oldest traces once the directory grows beyond this size
+        max_files: Prune the oldest traces beyond this number of files
+    """
+
+    def __init__(self, policy="off", trace_dir="traces", sample_rate=0.1, max_total_mb=500, max_files=20):
+        if policy not in TRACING_POLICIES:
+            raise ValueError(f"Unknown tracing policy: {policy} (expected one of {', '.join(TRACING_POLICIES)})")
+        self.policy = policy
+        self.settings = TRACING_POLICIES[policy]
+        self.trace_dir = trace_dir
+        self.sample_rate = sample_rate
+        self.max_total_bytes = max_total_mb * 1024 * 1024
+        self.max_files = max_files
+
+    def should_trace(self, attempt=1):
+        """
+        Whether the next test should be traced at all. attempt is 1 for the first run
+        of a test and counts up when it is rerun (e.g. by pytest-rerunfailures).
+        """
+        if self.settings is None:
+            return False
+        if self.policy == "on-retry":
+            # Green runs pay nothing; only a rerun of a failed test is recorded
+            return attempt > 1
+        if self.policy == "sampled":
+            return random.random() < self.sample_rate
+        return True
+
+    def start_options(self):
+        """Keyword arguments for context.tracing.start."""
+        return {key: value for key, value in self.settings.items() if key != "retain"}
+
+    def should_retain(self, failed):
+        """Whether a finished trace should be written to disk."""
+        return self.settings["retain"] == "always" or failed
+
+    def trace_path(self, test_name):
+        """A unique file path for a test's trace."""
+        os.makedirs(self.trace_dir, exist_ok=True)
+        safe_name = safe_filename(test_name, "test")
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+        return os.path.join(self.trace_dir, f"{safe_name}_{timestamp}_{os.getpid()}.zip")
+
+    def prune(self):
+        """Delete the oldest traces until the directory is within the size and file budgets."""
+        if not os.path.isdir(self.trace_dir):
+            return []
+
+        traces = []
+        for name in os.listdir(self.trace_dir):
+            path = os.path.join(self.trace_dir, name)
+            if name.endswith(".zip") and os.path.isfile(path):
+                stat = os.stat(path)
+                traces.append((stat.st_mtime, stat.st_size, path))
+        traces.sort()
+
+        total = sum(size for _, size, _ in traces)
+        removed = []
+        while traces and (total > self.max_total_bytes or len(traces) > self.max_files):
+            _, size, path = traces.pop(0)
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError as e:
+                print(f"Could not remove old trace {path}: {e}")
+            total -= size
+        return removed